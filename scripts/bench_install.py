@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+安装性能测试 - 用本地 file:// 仓库模拟包含大量技能和大文件的单一仓库，对比各种获取方式的传输量和耗时:
+    clone      原来的 git clone --depth 1
+    mirror     镜像缓存获取整个仓库（安装整个仓库时）
+    skill      镜像缓存只获取单个技能的目录（安装单个技能时）
+    tarball    从本地 HTTP 服务器下载仓库压缩包，只解压单个技能的目录
+传输量以获取后仓库对象（.git / 镜像目录）的大小或压缩包大小计算
+
+用法:
+    python scripts/bench_install.py --skills 300 --asset-kb 256
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import functools
+import subprocess
+from pathlib import Path
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from skill_hub.utils import git_cache, tarball_fetch
+
+
+def _run(*args, cwd=None):
+    subprocess.run(args, cwd=cwd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def make_fixture(root, skills, asset_kb):
+    """生成 root/bench/monorepo 仓库：每个技能一个 SKILL.md 和一个随机内容的资源文件"""
+    repo_dir = root / 'bench' / 'monorepo'
+    for i in range(skills):
+        skill_dir = repo_dir / 'skills' / f"skill-{i}"
+        skill_dir.mkdir(parents=True)
+        (skill_dir / 'SKILL.md').write_text(f"# skill-{i}\n", encoding='utf-8')
+        (skill_dir / 'asset.bin').write_bytes(os.urandom(asset_kb * 1024))
+    _run('git', 'init', '--quiet', cwd=repo_dir)
+    _run('git', 'add', '-A', cwd=repo_dir)
+    _run('git', '-c', 'user.name=bench', '-c', 'user.email=bench@example.com',
+         'commit', '--quiet', '-m', 'fixture', cwd=repo_dir)
+    # 允许部分克隆和按对象下载（GitHub 默认支持）
+    _run('git', 'config', 'uploadpack.allowFilter', 'true', cwd=repo_dir)
+    _run('git', 'config', 'uploadpack.allowAnySHA1InWant', 'true', cwd=repo_dir)
+    return 'bench/monorepo'
+
+
+def publish_archive(repo_dir, repo, www_dir):
+    """把仓库压缩包按 codeload 的路径格式（{owner}/{repo}/tar.gz/HEAD）放到 www_dir 中"""
+    archive_path = www_dir / repo / 'tar.gz' / 'HEAD'
+    archive_path.parent.mkdir(parents=True)
+    commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=repo_dir, check=True,
+                            stdout=subprocess.PIPE).stdout.decode('utf-8').strip()
+    _run('git', 'archive', '--format=tar.gz', f"--prefix={repo.replace('/', '-')}-{commit[:7]}/",
+         '-o', str(archive_path), 'HEAD', cwd=repo_dir)
+    return archive_path
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _measure(label, action, size_path):
+    started = time.time()
+    action()
+    elapsed = time.time() - started
+    size = size_path.stat().st_size if size_path.is_file() else git_cache._dir_size(size_path)
+    print(f"{label:<8} {size / 1024:>10.0f} KB {elapsed:>8.2f} s")
+    return size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="安装性能测试")
+    parser.add_argument('--skills', type=int, default=300, help="仓库中的技能数")
+    parser.add_argument('--asset-kb', type=int, default=256, help="每个技能资源文件的大小（KB）")
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp())
+    try:
+        repo = make_fixture(root, args.skills, args.asset_kb)
+        # 把 https://github.com/ 指向本地仓库
+        os.environ['GIT_CONFIG_COUNT'] = '1'
+        os.environ['GIT_CONFIG_KEY_0'] = f"url.file://{root}/.insteadOf"
+        os.environ['GIT_CONFIG_VALUE_0'] = 'https://github.com/'
+        print(f"仓库: {args.skills} 个技能，每个资源文件 {args.asset_kb} KB")
+        print(f"{'方式':<8} {'传输量':>13} {'耗时':>10}")
+
+        clone_dir = root / 'clone'
+        _measure('clone', lambda: _run('git', 'clone', '--depth', '1', '--quiet',
+                                       f"https://github.com/{repo}", str(clone_dir)), clone_dir / '.git')
+
+        git_cache.cache_dir = root / 'cache-full'
+        _measure('mirror', lambda: git_cache.checkout(repo, root / 'full'), git_cache.mirror_path(repo))
+
+        git_cache.cache_dir = root / 'cache-skill'
+        _measure('skill', lambda: git_cache.checkout(repo, root / 'skill', ['skill-7']),
+                 git_cache.mirror_path(repo))
+
+        www_dir = root / 'www'
+        archive_path = publish_archive(root / repo, repo, www_dir)
+        handler = functools.partial(_QuietHandler, directory=str(www_dir))
+        with ThreadingHTTPServer(('127.0.0.1', 0), handler) as server:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            tarball_fetch.archive_url = f"http://127.0.0.1:{server.server_address[1]}"
+            _measure('tarball', lambda: tarball_fetch.checkout(repo, root / 'tarball', ['skill-7']), archive_path)
+            server.shutdown()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
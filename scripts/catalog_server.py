@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+本地目录测试服务器 - 用一组目录快照模拟带版本号和差异文件的目录服务器，便于离线测试增量更新
+
+快照目录中按版本号存放完整目录文件，例如:
+    snapshots/skill.list.1  snapshots/skill.list.2  snapshots/repo.sort.1 ...
+服务器为每个目录发布最新版本的完整文件及其 .gz 压缩版本、.version 和逐版本的 .delta/<N>（格式见 skill_hub/utils/catalog_delta.py），
+每次请求都会输出路径和返回的字节数
+
+用法:
+    python scripts/catalog_server.py snapshots --port 8765
+    SKILL_HUB_CATALOG_URL=http://127.0.0.1:8765 SKILL_HUB_REFRESH_HOURS=0 skill search pdf
+新增一个快照后重启服务器即可模拟目录更新；--publish 只生成发布文件不启动服务器
+"""
+
+import os
+import sys
+import gzip
+import argparse
+import tempfile
+import functools
+from pathlib import Path
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from skill_hub.utils import catalog_delta
+
+
+def publish(snapshot_dir, out_dir):
+    """把快照目录中的各版本目录文件生成为发布文件，返回 {目录名: 最新版本号}"""
+    versions = {}
+    for path in snapshot_dir.iterdir():
+        name, _, number = path.name.rpartition('.')
+        if name and number.isdigit():
+            versions.setdefault(name, {})[int(number)] = path
+
+    published = {}
+    for name, snapshots in versions.items():
+        numbers = sorted(snapshots)
+        if numbers != list(range(1, len(numbers) + 1)):
+            raise SystemExit(f"{name} 的版本号必须从 1 开始连续编号: {numbers}")
+
+        delta_dir = out_dir / f"{name}.delta"
+        delta_dir.mkdir(parents=True, exist_ok=True)
+        previous = None
+        for number in numbers:
+            lines = catalog_delta.split_lines(snapshots[number].read_bytes())
+            if previous is not None:
+                (delta_dir / str(number)).write_text(catalog_delta.make_delta(previous, lines), encoding='utf-8')
+            previous = lines
+
+        data = catalog_delta.join_lines(previous)
+        (out_dir / name).write_bytes(data)
+        (out_dir / f"{name}.gz").write_bytes(gzip.compress(data))
+        (out_dir / f"{name}.version").write_text(
+            catalog_delta.format_version(numbers[-1], catalog_delta.checksum(data)), encoding='utf-8')
+        published[name] = numbers[-1]
+    return published
+
+
+class _LoggingHandler(SimpleHTTPRequestHandler):
+    """输出每次请求返回的字节数，便于对比完整下载和增量更新的流量"""
+
+    def send_head(self):
+        f = super().send_head()
+        if f is not None:
+            print(f"{self.command} {self.path} 200 {os.fstat(f.fileno()).st_size} bytes", flush=True)
+        return f
+
+    def log_request(self, code='-', size='-'):
+        # 成功的请求在 send_head 中连同字节数一起输出
+        if str(code) != '200':
+            print(f"{self.command} {self.path} {code}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地目录测试服务器")
+    parser.add_argument('snapshots', type=Path, help="存放 skill.list.N / repo.sort.N 快照的目录")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--publish', type=Path, help="只把发布文件生成到该目录，不启动服务器")
+    args = parser.parse_args()
+
+    if args.publish:
+        print(publish(args.snapshots, args.publish))
+        return
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        print(publish(args.snapshots, Path(out_dir)))
+        handler = functools.partial(_LoggingHandler, directory=out_dir)
+        with ThreadingHTTPServer(('127.0.0.1', args.port), handler) as server:
+            print(f"目录服务器运行在 http://127.0.0.1:{args.port}", flush=True)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+
+
+if __name__ == '__main__':
+    main()
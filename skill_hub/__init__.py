@@ -38,6 +38,7 @@ def main():
     # search 命令
     search_parser = subparsers.add_parser('search', help='搜索skill')
     search_parser.add_argument('query', nargs='?', help='搜索关键词')
+    search_parser.add_argument('--stream', action='store_true', help='按目录顺序边找边输出，不按相关度排序')
     
     # manage 命令
     manage_parser = subparsers.add_parser('manage', help='管理已安装的skills和agents')
@@ -86,7 +87,7 @@ def main():
 
     elif args.command == 'search':
         from skill_hub.commands.search import search_skills
-        search_skills(args.query)
+        search_skills(args.query, args.stream)
     elif args.command == 'manage':
         from skill_hub.commands.manage import manage_skills
         manage_skills()
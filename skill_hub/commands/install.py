@@ -13,6 +13,9 @@ import sys
 from io import StringIO
 import threading
 import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from skill_hub.utils import git_cache, repo_fetch, install_manifest
 
 
 def install_skill(target=None, force_update=False):
@@ -59,186 +62,239 @@ def install_from_file(file_path, force_update=False):
         return
     
     print(f"从文件 {file_path} 读取到 {len(targets)} 个安装目标")
-    
+    results = install_targets(targets, force_update)
+    _print_summary(results)
+
+
+# 安装结果状态
+INSTALLED = 'installed'
+SKIPPED = 'skipped'
+NOT_FOUND = 'not_found'
+FAILED = 'failed'
+
+_STATUS_LABELS = {
+    INSTALLED: '已安装',
+    SKIPPED: '已存在，跳过',
+    NOT_FOUND: '未找到',
+    FAILED: '失败',
+}
+
+# 批量安装时同时处理的仓库数，可通过环境变量 SKILL_HUB_INSTALL_WORKERS 配置
+try:
+    INSTALL_WORKERS = max(1, int(os.environ.get('SKILL_HUB_INSTALL_WORKERS', 4)))
+except ValueError:
+    INSTALL_WORKERS = 4
+
+
+def _parse_target(target):
+    """把安装目标解析为 (技能名, 仓库)，整个仓库时技能名为 None"""
+    if '@' in target:
+        skill_name, repo = target.split('@', 1)
+        return skill_name, repo
+    return None, target
+
+
+def install_targets(targets, force_update=False, workers=None):
+    """
+    批量安装：按仓库分组，每个仓库只克隆一次并从同一份检出中安装该仓库的全部目标，
+    不同仓库在有限大小的线程池中并行处理；每个仓库的输出在其完成后整体打印，避免交错
+    返回 {目标: (状态, 说明)}，顺序与 targets 一致；某个仓库的处理意外出错时，该仓库的目标都记为失败
+    """
+    targets = list(dict.fromkeys(targets))
+    groups = {}
     for target in targets:
-        print(f"\n正在处理: {target}")
-        if '@' in target:
-            # 格式为 skill@repo
-            skill_name, repo = target.split('@', 1)
-            install_specific_skill(skill_name, repo, force_update)
+        skill_name, repo = _parse_target(target)
+        groups.setdefault(repo, []).append((target, skill_name))
+
+    results = {}
+    workers = min(workers or INSTALL_WORKERS, len(groups)) or 1
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for repo, entries in groups.items():
+            output = []
+            future = executor.submit(_install_repo_targets, repo, entries, force_update, output.append)
+            futures[future] = (repo, entries, output)
+        for done, future in enumerate(as_completed(futures), 1):
+            repo, entries, output = futures[future]
+            try:
+                results.update(future.result())
+            except Exception as e:
+                output.append(f"安装仓库 {repo} 时出错: {e}")
+                results.update({target: (FAILED, str(e)) for target, _ in entries})
+            print(f"\n[{done}/{len(futures)}]")
+            print('\n'.join(output))
+    return {target: results[target] for target in targets}
+
+
+def _print_summary(results):
+    """输出批量安装中每个目标的结果"""
+    counts = {}
+    print("\n安装结果:")
+    for target, (status, message) in results.items():
+        counts[status] = counts.get(status, 0) + 1
+        detail = f" ({message})" if message else ""
+        print(f"  {_STATUS_LABELS[status]:<8} {target}{detail}")
+    print("共 {} 个目标: {}".format(
+        len(results), "，".join(f"{_STATUS_LABELS[status]} {count}" for status, count in counts.items())))
+
+
+def _clone_repo(repo, dest, skill_names=None):
+    """
+    获取 GitHub 仓库的最新内容并导出到 dest（默认从本地镜像缓存增量获取，见 repo_fetch），失败时抛出异常
+    指定 skill_names 时只下载和导出这些技能的目录；返回提交的 sha（无法得知时为 None）
+    """
+    return repo_fetch.checkout(repo, dest, skill_names)
+
+
+def _copy_tree_contents(source_dir, dest_dir):
+    """清空 dest_dir 后把 source_dir 中的所有内容复制进去"""
+    if dest_dir.exists():
+        shutil.rmtree(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    for item in source_dir.iterdir():
+        dest_item = dest_dir / item.name
+        if item.is_dir():
+            shutil.copytree(item, dest_item)
         else:
-            # 格式为 repo，格式为 owner/repo_name
-            repo = target
-            install_all_skills_from_repo(repo, force_update)
+            shutil.copy2(item, dest_item)
 
 
-def install_all_skills_from_repo(repo, force_update=False):
-    """安装指定仓库的所有skill"""
+def _install_repo_from_checkout(checkout, repo, repo_dir, log=print):
+    """从仓库检出中安装所有带 SKILL.md 的技能，返回安装的技能数"""
+    repo_name = repo.split('/')[1]
+    # 检查根目录是否有SKILL.md，如果有则将整个仓库作为一个技能
+    if (checkout / 'SKILL.md').exists():
+        # 使用仓库名作为技能名，创建子目录，保持与单个技能安装一致
+        _copy_tree_contents(checkout, repo_dir / repo_name)
+        log(f"已安装技能: {repo_name}@{repo}")
+        return 1
+
+    installed = 0
+    # 查找带有SKILL.md的子目录
+    for root, dirs, files in os.walk(checkout):
+        if 'SKILL.md' in files:
+            skill_dir = Path(root)
+            skill_name = skill_dir.name
+            target_skill_dir = repo_dir / skill_name
+            if not target_skill_dir.exists():
+                # 复制技能目录
+                shutil.copytree(skill_dir, target_skill_dir)
+                log(f"已安装技能: {skill_name}@{repo}")
+                installed += 1
+            else:
+                log(f"技能 {skill_name}@{repo} 已存在")
+    return installed
+
+
+def _install_skill_from_checkout(checkout, skill_name, repo, skill_dir, log=print):
+    """从仓库检出中安装指定技能，返回是否找到该技能"""
+    repo_name = repo.split('/')[1]
+    # 检查根目录是否有SKILL.md，如果是请求的技能名匹配仓库名，则使用整个仓库
+    if (checkout / 'SKILL.md').exists() and skill_name == repo_name:
+        _copy_tree_contents(checkout, skill_dir)
+        log(f"已安装技能: {skill_name}@{repo}")
+        return True
+
+    # 在仓库中查找指定的技能目录
+    for root, dirs, files in os.walk(checkout):
+        if Path(root).name == skill_name and 'SKILL.md' in files:
+            # 复制技能目录
+            shutil.copytree(Path(root), skill_dir)
+            log(f"已安装技能: {skill_name}@{repo}")
+            return True
+
+    log(f"在仓库 {repo} 中未找到技能 {skill_name} 或该技能没有SKILL.md文件")
+    return False
+
+
+def _install_repo_targets(repo, entries, force_update=False, log=print):
+    """
+    安装同一仓库中的一组目标，只克隆一次仓库
+    :param entries: [(目标, 技能名)]，技能名为 None 表示安装整个仓库
+    :param log: 输出函数，批量安装时收集输出，完成后再整体打印
+    :return: {目标: (状态, 说明)}
+    """
     skill_hub_dir = Path.home() / '.skill-hub'
-    
+    results = {}
+
     # 解析 repo 为 owner/repo_name 格式
     repo_parts = repo.split('/')
     if len(repo_parts) != 2:
-        print(f"无效的仓库格式: {repo}，应为 owner/repo_name 格式")
-        return
-    
+        log(f"无效的仓库格式: {repo}，应为 owner/repo_name 格式")
+        return {target: (FAILED, "无效的仓库格式") for target, _ in entries}
+
     owner, repo_name = repo_parts
     repo_dir = skill_hub_dir / owner / repo_name
-    
-    # 如果存在且不是强制更新，则跳过
-    if repo_dir.exists() and not force_update:
-        print(f"仓库 {repo} 已存在，跳过安装。使用 -u 参数强制更新。")
-        return
-    
-    # 如果是强制更新，删除已存在的目录
-    if force_update and repo_dir.exists():
-        print(f"正在删除旧的仓库 {repo}...")
-        shutil.rmtree(repo_dir)
-    
-    # 创建目录
-    repo_dir.mkdir(parents=True, exist_ok=True)
-    
-    print(f"正在安装仓库 {repo} 的所有技能...")
-    
-    # 从GitHub克隆仓库到临时目录
-    temp_dir = Path(tempfile.mkdtemp())
-    try:
-        repo_url = f"https://github.com/{repo}"
-        result = subprocess.run(
-            ['git', 'clone', '--depth', '1', '--quiet', repo_url, str(temp_dir)],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=60  # 60秒超时
-        )
-        
-        # 检查根目录是否有SKILL.md，如果有则将整个仓库作为一个技能
-        root_skill_md = temp_dir / 'SKILL.md'
-        if root_skill_md.exists():
-            skill_name = repo_name  # 使用仓库名作为技能名
-            target_skill_dir = repo_dir / skill_name  # 创建子目录，保持与install_specific_skill一致
-            # 清空目标目录并复制内容
-            if target_skill_dir.exists():
-                shutil.rmtree(target_skill_dir)
-            target_skill_dir.mkdir(parents=True, exist_ok=True)
-            for item in temp_dir.iterdir():
-                dest_item = target_skill_dir / item.name
-                if item.is_dir():
-                    shutil.copytree(item, dest_item)
-                else:
-                    shutil.copy2(item, dest_item)
-            print(f"已安装技能: {skill_name}@{repo}")
+
+    # 先处理整个仓库的目标：强制更新时会删除整个仓库目录
+    pending = []
+    for target, skill_name in sorted(entries, key=lambda entry: entry[1] is not None):
+        if skill_name is None:
+            # 如果存在且不是强制更新，则跳过
+            if repo_dir.exists() and not force_update:
+                log(f"仓库 {repo} 已存在，跳过安装。使用 -u 参数强制更新。")
+                results[target] = (SKIPPED, "")
+                continue
+            # 如果是强制更新，删除已存在的目录
+            if force_update and repo_dir.exists():
+                log(f"正在删除旧的仓库 {repo}...")
+                shutil.rmtree(repo_dir)
+            repo_dir.mkdir(parents=True, exist_ok=True)
+            log(f"正在安装仓库 {repo} 的所有技能...")
         else:
-            # 查找带有SKILL.md的子目录
-            for root, dirs, files in os.walk(temp_dir):
-                if 'SKILL.md' in files:
-                    skill_dir = Path(root)
-                    skill_name = skill_dir.name
-                    
-                    target_skill_dir = repo_dir / skill_name
-                    if not target_skill_dir.exists():
-                        # 复制技能目录
-                        shutil.copytree(skill_dir, target_skill_dir)
-                        print(f"已安装技能: {skill_name}@{repo}")
-                    else:
-                        print(f"技能 {skill_name}@{repo} 已存在")
-    except subprocess.CalledProcessError as e:
-        print(f"无法克隆仓库 {repo}: {e}")
-        print(f"错误输出: {e.stderr.decode('utf-8', errors='replace') if hasattr(e, 'stderr') else 'N/A'}")
-    except subprocess.TimeoutExpired:
-        print(f"克隆仓库 {repo} 超时（60秒）")
-    except Exception as e:
-        print(f"安装仓库 {repo} 时出错: {e}")
-    finally:
-        # 清理临时目录
-        try:
-            if temp_dir.exists():
-                shutil.rmtree(temp_dir)
-        except:
-            pass  # 如果临时目录清理失败，忽略错误
+            skill_dir = repo_dir / skill_name
+            if skill_dir.exists() and not force_update:
+                log(f"技能 {skill_name}@{repo} 已存在，跳过安装。使用 -u 参数强制更新。")
+                results[target] = (SKIPPED, "")
+                continue
+            if force_update and skill_dir.exists():
+                log(f"正在删除旧的技能 {skill_name}@{repo}...")
+                shutil.rmtree(skill_dir)
+            skill_dir.parent.mkdir(parents=True, exist_ok=True)
+            log(f"正在安装技能 {skill_name}@{repo}...")
+        pending.append((target, skill_name))
 
+    if not pending:
+        return results
 
-def install_specific_skill(skill_name, repo, force_update=False):
-    """安装指定仓库的指定skill"""
-    skill_hub_dir = Path.home() / '.skill-hub'
-    
-    # 解析 repo 为 owner/repo_name 格式
-    repo_parts = repo.split('/')
-    if len(repo_parts) != 2:
-        print(f"无效的仓库格式: {repo}，应为 owner/repo_name 格式")
-        return
-    
-    owner, repo_name = repo_parts
-    skill_dir = skill_hub_dir / owner / repo_name / skill_name
-    
-    # 如果存在且不是强制更新，则跳过
-    if skill_dir.exists() and not force_update:
-        print(f"技能 {skill_name}@{repo} 已存在，跳过安装。使用 -u 参数强制更新。")
-        return
-    
-    # 如果是强制更新，删除已存在的目录
-    if force_update and skill_dir.exists():
-        print(f"正在删除旧的技能 {skill_name}@{repo}...")
-        shutil.rmtree(skill_dir)
-    
-    # 创建目录
-    skill_dir.parent.mkdir(parents=True, exist_ok=True)
-    
-    print(f"正在安装技能 {skill_name}@{repo}...")
-    
     # 从GitHub克隆仓库到临时目录
     temp_dir = Path(tempfile.mkdtemp())
     try:
-        repo_url = f"https://github.com/{repo}"
-        result = subprocess.run(
-            ['git', 'clone', '--depth', '1', '--quiet', repo_url, str(temp_dir)],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=60  # 60秒超时
-        )
-        
-        # 检查根目录是否有SKILL.md，如果是请求的技能名匹配仓库名，则使用整个仓库
-        root_skill_md = temp_dir / 'SKILL.md'
-        if root_skill_md.exists() and skill_name == repo_name:
-            # 将临时目录的所有内容直接复制到目标位置
-            skill_dir.parent.mkdir(parents=True, exist_ok=True)  # 确保父目录存在
-            if skill_dir.exists():
-                # 先清空目标目录
-                shutil.rmtree(skill_dir)
-            # 创建目标目录并复制内容
-            skill_dir.mkdir(parents=True, exist_ok=True)
-            for item in temp_dir.iterdir():
-                dest_item = skill_dir / item.name
-                if item.is_dir():
-                    shutil.copytree(item, dest_item)
-                else:
-                    shutil.copy2(item, dest_item)
-            print(f"已安装技能: {skill_name}@{repo}")
-        else:
-            # 在仓库中查找指定的技能目录
-            found = False
-            for root, dirs, files in os.walk(temp_dir):
-                if Path(root).name == skill_name and 'SKILL.md' in files:
-                    source_skill_dir = Path(root)
-                    # 复制技能目录
-                    shutil.copytree(source_skill_dir, skill_dir)
-                    print(f"已安装技能: {skill_name}@{repo}")
-                    found = True
-                    break
-            
-            if not found:
-                print(f"在仓库 {repo} 中未找到技能 {skill_name} 或该技能没有SKILL.md文件")
-                # 如果创建了目录但没找到技能，删除空目录
-                if skill_dir.exists() and not any(skill_dir.iterdir()):
-                    skill_dir.rmdir()
+        # 只安装指定技能时只下载这些技能的目录
+        skill_names = [skill_name for _, skill_name in pending]
+        commit = _clone_repo(repo, temp_dir, None if None in skill_names else skill_names)
     except subprocess.CalledProcessError as e:
-        print(f"无法克隆仓库 {repo}: {e}")
-        print(f"错误输出: {e.stderr.decode('utf-8', errors='replace') if hasattr(e, 'stderr') else 'N/A'}")
+        log(f"无法克隆仓库 {repo}: {e}")
+        log(f"错误输出: {e.stderr.decode('utf-8', errors='replace') if e.stderr else 'N/A'}")
+        results.update((target, (FAILED, "克隆失败")) for target, _ in pending)
     except subprocess.TimeoutExpired:
-        print(f"克隆仓库 {repo} 超时（60秒）")
+        log(f"克隆仓库 {repo} 超时（{git_cache.FETCH_TIMEOUT}秒）")
+        results.update((target, (FAILED, "克隆超时")) for target, _ in pending)
     except Exception as e:
-        print(f"安装技能 {skill_name}@{repo} 时出错: {e}")
+        log(f"克隆仓库 {repo} 时出错: {e}")
+        results.update((target, (FAILED, str(e))) for target, _ in pending)
+    else:
+        for target, skill_name in pending:
+            try:
+                if skill_name is None:
+                    count = _install_repo_from_checkout(temp_dir, repo, repo_dir, log)
+                    results[target] = (INSTALLED, f"{count} 个技能")
+                elif (repo_dir / skill_name).exists():
+                    # 已随同一批次中的整个仓库一起安装
+                    results[target] = (INSTALLED, "")
+                elif _install_skill_from_checkout(temp_dir, skill_name, repo, repo_dir / skill_name, log):
+                    results[target] = (INSTALLED, "")
+                else:
+                    results[target] = (NOT_FOUND, "")
+                if results[target][0] == INSTALLED:
+                    # 记录来源提交，更新时据此判断是否需要重新下载
+                    install_manifest.record(repo, commit, skill_name)
+            except Exception as e:
+                if skill_name is None:
+                    log(f"安装仓库 {repo} 时出错: {e}")
+                else:
+                    log(f"安装技能 {skill_name}@{repo} 时出错: {e}")
+                results[target] = (FAILED, str(e))
     finally:
         # 清理临时目录
         try:
@@ -246,6 +302,25 @@ def install_specific_skill(skill_name, repo, force_update=False):
                 shutil.rmtree(temp_dir)
         except:
             pass  # 如果临时目录清理失败，忽略错误
+        # 没有安装任何技能时，删除为此创建的空目录；所有者目录可能同时被其他线程写入，删除失败时保留
+        for created_dir in (repo_dir, repo_dir.parent):
+            try:
+                if created_dir.exists() and not any(created_dir.iterdir()):
+                    created_dir.rmdir()
+            except OSError:
+                pass
+    return results
+
+
+def install_all_skills_from_repo(repo, force_update=False):
+    """安装指定仓库的所有skill，返回 (状态, 说明)"""
+    return _install_repo_targets(repo, [(repo, None)], force_update)[repo]
+
+
+def install_specific_skill(skill_name, repo, force_update=False):
+    """安装指定仓库的指定skill，返回 (状态, 说明)"""
+    target = f"{skill_name}@{repo}"
+    return _install_repo_targets(repo, [(target, skill_name)], force_update)[target]
 
 
 def install_all_skills_from_repo_silent(repo, force_update=False):
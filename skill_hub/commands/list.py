@@ -41,7 +41,8 @@ def get_skill_hub_skills():
     
     # 遍历 ~/.skill-hub 目录下的所有文件夹
     for owner_dir in skill_hub_dir.iterdir():
-        if owner_dir.is_dir():
+        # 跳过 .cache 等内部目录
+        if owner_dir.is_dir() and not owner_dir.name.startswith('.'):
             owner_name = owner_dir.name
             # 遍历所有仓库目录
             for repo_dir in owner_dir.iterdir():
@@ -4,9 +4,12 @@
 """
 
 import curses
-import requests
 import io
 import sys
+import itertools
+from collections import OrderedDict
+import threading
+import time
 from contextlib import redirect_stdout, redirect_stderr
 from pathlib import Path
 from skill_hub.commands.install import install_skill
@@ -17,11 +20,26 @@ from skill_hub.utils.agent_cmd import (
 )
 from skill_hub.utils.display import show_file_content,_display_wrapped_lines
 from skill_hub.commands.sync import sync_skill_single
+from skill_hub.utils import md_cache
 
 
 # 每页显示数量
 PAGE_SIZE = 20
 
+# 每个标签页最多保留的前缀搜索结果数量
+MATCH_STACK_SIZE = 32
+
+# 输入关键词后停顿多少毫秒才开始搜索，以及等待搜索结果时的轮询间隔
+SEARCH_DEBOUNCE_MS = 120
+SEARCH_POLL_MS = 30
+
+# 每个标签页缓存的 (关键词, 页码) 结果数量
+PAGE_CACHE_SIZE = 16
+
+# 后台预取光标之后 / 之前多少行技能的 SKILL.md 预览
+PREFETCH_AFTER = 3
+PREFETCH_BEFORE = 1
+
 skill_md_url = 'https://skill-hub.oss-cn-shanghai.aliyuncs.com/skills/{owner}/{repo}/{skill_name}.md'
 
 
@@ -37,15 +55,29 @@ class OutputCapture:
         pass
 
 
-def search_skills(query=None):
-    """搜索技能命令 - 支持参数查询或交互界面"""
+def search_skills(query=None, stream=False):
+    """
+    搜索技能命令 - 支持参数查询或交互界面
+    :param stream: 按目录顺序边找边输出（不排序），下游可以立即开始处理；默认输出按相关度排序的前 50 条，
+                   无论是否输出到终端顺序都相同
+    """
     if query:  # 如果提供了查询参数，直接返回搜索结果
-        from skill_hub.utils.skill_mng import get_skills
-        results, total = get_skills(query, page=1, size=50)
-        for result in results:
-            print(result)
-        if not results:
+        from skill_hub.utils.skill_mng import match_skills, iter_skills, wait_for_refresh
+        found = False
+        try:
+            if stream:
+                results = itertools.islice(iter_skills(query), 50)
+            else:
+                results = match_skills(query).page(1, 50)
+            for result in results:
+                print(result, flush=stream)
+                found = True
+        except Exception as e:
+            print(f"读取技能文件时出错: {e}")
+        if not found:
             print(f"未找到 '{query}' 相关的技能")
+        # 目录已过期时本次搜索使用旧目录，退出前等待后台刷新完成，下次搜索使用新目录
+        wait_for_refresh()
     else:  # 没有参数，则打开交互界面
         try:
             if not sys.stdout.isatty():
@@ -75,20 +107,45 @@ def _search_ui(stdscr):
     current_tab = 0
 
     tab_states = [
-        {'page': 1, 'current_row': 0, 'scroll_offset': 0, 'search_text': "", 'filtered_data': [], 'total_count': 0},
-        {'page': 1, 'current_row': 0, 'scroll_offset': 0, 'search_text': "", 'filtered_data': [], 'total_count': 0}
+        {'page': 1, 'current_row': 0, 'scroll_offset': 0, 'search_text': "", 'filtered_data': [], 'total_count': 0, 'total_known': True,
+         'match_stack': []},
+        {'page': 1, 'current_row': 0, 'scroll_offset': 0, 'search_text': "", 'filtered_data': [], 'total_count': 0, 'total_known': True,
+         'match_stack': []}
     ]
 
+    # 搜索在后台线程中执行；输入关键词后停顿 SEARCH_DEBOUNCE_MS 才提交搜索
+    worker = _SearchWorker(tabs, tab_states)
+    typed_at = None
+
     # 初始加载数据
-    _load_tab_data(tabs[current_tab], tab_states[current_tab])
+    worker.load(current_tab)
 
     # 初始显示
-    _draw_main_screen(stdscr, tabs, current_tab, tab_states[current_tab])
+    _draw_main_screen(stdscr, tabs, current_tab, tab_states[current_tab], searching=True)
 
     while True:
-        # 获取用户输入
+        # 等待输入搜索停顿或后台搜索结果时定时唤醒，否则阻塞等待按键
+        stdscr.timeout(SEARCH_POLL_MS if typed_at is not None or worker.busy else -1)
         key = stdscr.getch()
 
+        changed = False
+        if typed_at is not None and time.monotonic() - typed_at >= SEARCH_DEBOUNCE_MS / 1000:
+            worker.load(current_tab)
+            typed_at = None
+            changed = True
+
+        # 只有最新一次搜索的结果会返回
+        result = worker.take()
+        if result is not None:
+            tab_index, loaded = result
+            _apply_loaded(tab_states[tab_index], loaded)
+            changed = True
+
+        if key == -1:
+            if changed:
+                _redraw(stdscr, tabs, current_tab, tab_states[current_tab], typed_at is not None or worker.busy)
+            continue
+
         # 处理ESC键退出
         if key == 27:
             break
@@ -98,15 +155,15 @@ def _search_ui(stdscr):
         # 处理左右箭头键切换标签页
         if key == curses.KEY_LEFT:
             current_tab = (current_tab - 1) % len(tabs)
-            _load_tab_data(tabs[current_tab], tab_states[current_tab])
+            worker.load(current_tab)
 
         elif key == curses.KEY_RIGHT:
             current_tab = (current_tab + 1) % len(tabs)
-            _load_tab_data(tabs[current_tab], tab_states[current_tab])
+            worker.load(current_tab)
 
         elif key == 9:  # 9 is the ASCII code for tab key
             current_tab = (current_tab + 1) % len(tabs)
-            _load_tab_data(tabs[current_tab], tab_states[current_tab])
+            worker.load(current_tab)
 
         # 处理回车键（进入详情页）
         elif key in [curses.KEY_ENTER, ord('\n'), ord('\r')]:
@@ -115,7 +172,7 @@ def _search_ui(stdscr):
             if current_data and 0 <= current_state['current_row'] < len(current_data):
                 selected_item = current_data[current_state['current_row']]
                 _show_detail_view(stdscr, tabs[current_tab], selected_item)
-                _load_tab_data(tabs[current_tab], tab_states[current_tab])
+                worker.load(current_tab)
 
         # 字母数字搜索
         elif 32 <= key <= 126:
@@ -123,7 +180,7 @@ def _search_ui(stdscr):
             current_state['page'] = 1
             current_state['current_row'] = 0
             current_state['scroll_offset'] = 0
-            _load_tab_data(tabs[current_tab], current_state)
+            typed_at = time.monotonic()
 
         # 退格键
         elif key == curses.KEY_BACKSPACE or key == 127 or key == 8:
@@ -132,7 +189,7 @@ def _search_ui(stdscr):
                 current_state['page'] = 1
                 current_state['current_row'] = 0
                 current_state['scroll_offset'] = 0
-                _load_tab_data(tabs[current_tab], current_state)
+                typed_at = time.monotonic()
 
         # 方向键 - 上下移动光标
         elif key == curses.KEY_UP:
@@ -148,29 +205,187 @@ def _search_ui(stdscr):
                 current_state['page'] -= 1
                 current_state['current_row'] = 0
                 current_state['scroll_offset'] = 0
-                _load_tab_data(tabs[current_tab], current_state)
+                worker.load(current_tab)
+                typed_at = None
 
         # Page Down - 下一页
         elif key == curses.KEY_NPAGE:
             current_state = tab_states[current_tab]
             total_pages = (current_state['total_count'] + PAGE_SIZE - 1) // PAGE_SIZE if current_state['total_count'] > 0 else 1
-            if current_state['page'] < total_pages:
+            # 总数只是估算时，当前页已满就允许继续翻页
+            has_more = not current_state['total_known'] and len(current_state['filtered_data']) == PAGE_SIZE
+            if current_state['page'] < total_pages or has_more:
                 current_state['page'] += 1
                 current_state['current_row'] = 0
                 current_state['scroll_offset'] = 0
-                _load_tab_data(tabs[current_tab], current_state)
+                worker.load(current_tab)
+                typed_at = None
 
         # 处理完输入后，更新滚动偏移并重绘
-        current_state = tab_states[current_tab]
-        height, width = stdscr.getmaxyx()
-        max_display_items = height - 4
-        _update_scroll_offset(current_state, max_display_items)
-        _draw_main_screen(stdscr, tabs, current_tab, current_state)
+        _redraw(stdscr, tabs, current_tab, tab_states[current_tab], typed_at is not None or worker.busy)
 
 
-def _draw_main_screen(stdscr, tabs, current_tab, state):
-    """绘制主界面"""
-    stdscr.clear()
+def _redraw(stdscr, tabs, current_tab, state, searching):
+    """更新滚动偏移并重绘主界面，然后预取光标附近的预览"""
+    height, width = stdscr.getmaxyx()
+    max_display_items = height - 4
+    _update_scroll_offset(state, max_display_items)
+    _draw_main_screen(stdscr, tabs, current_tab, state, searching)
+    _prefetch_previews(tabs[current_tab], state)
+
+
+def _apply_loaded(state, loaded):
+    """把加载结果（后台搜索结果或页缓存）应用到界面状态"""
+    for field in ('page', 'filtered_data', 'total_count', 'total_known'):
+        state[field] = loaded[field]
+    state['current_row'] = min(state['current_row'], max(len(state['filtered_data']) - 1, 0))
+
+
+class _SearchWorker:
+    """
+    后台搜索线程：只执行最新提交的加载请求，尚未开始就被新请求取代的请求直接丢弃，
+    执行中被取代的请求在搜索完成后跳过取页，其结果也不会返回给界面
+    每个标签页有一个 (关键词, 页码) -> (目录版本, 结果) 的 LRU 页缓存，目录版本与当前不一致的页不会被使用；
+    空闲时预取当前页的下一页和另一个标签页的当前页
+    各标签页的 match_stack 只在该线程中读写
+    """
+
+    def __init__(self, tabs, tab_states):
+        self._tabs = tabs
+        self._tab_states = tab_states
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._request = None
+        self._result = None
+        self._prefetch = []
+        self._page_cache = [OrderedDict() for _ in tabs]
+        self._versions = [None for _ in tabs]
+        self.busy = False
+        threading.Thread(target=self._run, name='search-worker', daemon=True).start()
+
+    def load(self, tab_index):
+        """
+        加载标签页当前关键词和页码的数据：页缓存命中时直接应用到界面状态，否则提交给后台线程
+        state 的副本交给后台线程，界面继续使用原 state 显示旧结果
+        """
+        state = self._tab_states[tab_index]
+        version = self._version(tab_index)
+        with self._condition:
+            self._generation += 1
+            self._result = None
+            cached = self._cached(tab_index, state['search_text'], state['page'], version)
+            if cached is not None:
+                self._request = None
+                self.busy = False
+                _apply_loaded(state, cached)
+            else:
+                self._request = (self._generation, tab_index, dict(state))
+                self.busy = True
+            self._schedule_prefetch(tab_index, state['search_text'], state['page'])
+            self._condition.notify()
+
+    def take(self):
+        """取出最新请求的结果 (标签页序号, 加载后的 state)，还没有结果时返回 None"""
+        with self._condition:
+            result, self._result = self._result, None
+            return result
+
+    def _version(self, tab_index):
+        """标签页目录当前的版本（只读取文件状态，不搜索）"""
+        from skill_hub.utils.skill_mng import skills_version, repos_version
+
+        return skills_version() if self._tabs[tab_index]['type'] == 'skill' else repos_version()
+
+    def _cached(self, tab_index, search_text, page, version):
+        """页缓存中属于目录当前版本 version 的结果，没有时返回 None"""
+        cache = self._page_cache[tab_index]
+        entry = cache.get((search_text, page))
+        if entry is None or version is None or entry[0] != version:
+            return None
+        cache.move_to_end((search_text, page))
+        return entry[1]
+
+    def _store(self, tab_index, state, version):
+        cache = self._page_cache[tab_index]
+        cache[(state['search_text'], state['page'])] = (version, {
+            field: state[field] for field in ('page', 'filtered_data', 'total_count', 'total_known')})
+        while len(cache) > PAGE_CACHE_SIZE:
+            cache.popitem(last=False)
+
+    def _check_catalog(self, tab_index, result):
+        """目录更新后（搜索结果属于新的目录版本），该标签页缓存的页都已过期"""
+        if result is None:
+            return
+        if self._versions[tab_index] != result.version:
+            self._versions[tab_index] = result.version
+            self._page_cache[tab_index].clear()
+
+    def _schedule_prefetch(self, tab_index, search_text, page):
+        """预取当前页的下一页和其他标签页的当前页（替换之前尚未执行的预取）"""
+        self._prefetch = [(tab_index, search_text, page + 1)]
+        for other, state in enumerate(self._tab_states):
+            if other != tab_index:
+                self._prefetch.append((other, state['search_text'], state['page']))
+
+    def _stale(self, generation):
+        return generation != self._generation
+
+    def _next_task(self):
+        """取出下一个任务：优先执行加载请求，没有请求时执行一个尚未缓存的预取"""
+        with self._condition:
+            while True:
+                if self._request is not None:
+                    task, self._request = self._request, None
+                    return task
+                while self._prefetch:
+                    tab_index, search_text, page = self._prefetch.pop(0)
+                    if self._cached(tab_index, search_text, page, self._version(tab_index)) is None:
+                        state = dict(self._tab_states[tab_index], search_text=search_text, page=page)
+                        return None, tab_index, state
+                self._condition.wait()
+
+    def _run(self):
+        while True:
+            generation, tab_index, state = self._next_task()
+            try:
+                self._execute(generation, tab_index, state)
+            except Exception:
+                # 取页等出错（如数据库被锁定）时不能让线程退出，否则 busy 一直为 True：
+                # 加载请求返回空结果，预取直接放弃
+                _clear_loaded(state)
+                if generation is None:
+                    continue
+                with self._condition:
+                    if not self._stale(generation):
+                        self._result = (tab_index, state)
+                        self.busy = False
+
+    def _execute(self, generation, tab_index, state):
+        """执行一个任务：generation 为 None 时是预取"""
+        if generation is None:
+            # 预取：结果只写入页缓存；翻过末页时 _load_tab_data 会退回上一页，此时不缓存
+            requested_page = state['page']
+            result = _load_tab_data(self._tabs[tab_index], state)
+            with self._condition:
+                self._check_catalog(tab_index, result)
+                if result is not None and state['page'] == requested_page and state['filtered_data']:
+                    self._store(tab_index, state, result.version)
+            return
+
+        result = _load_tab_data(self._tabs[tab_index], state, stale=lambda: self._stale(generation))
+        with self._condition:
+            self._check_catalog(tab_index, result)
+            if not self._stale(generation):
+                if result is not None:
+                    self._store(tab_index, state, result.version)
+                self._result = (tab_index, state)
+                self.busy = False
+
+
+def _draw_main_screen(stdscr, tabs, current_tab, state, searching=False):
+    """绘制主界面，searching 为 True 时在页码后提示正在搜索"""
+    # erase 只清空缓冲区，由 refresh 增量更新终端，避免 clear 每次整屏重绘
+    stdscr.erase()
 
     height, width = stdscr.getmaxyx()
     current_data = state['filtered_data']
@@ -187,7 +402,9 @@ def _draw_main_screen(stdscr, tabs, current_tab, state):
     # 显示搜索框和页码
     search_display = f"搜索: {state['search_text']}_ "
     total_pages = (state['total_count'] + PAGE_SIZE - 1) // PAGE_SIZE if state['total_count'] > 0 else 1
-    page_info = f" 第{state['page']}/{total_pages}页"
+    page_info = f" 第{state['page']}/{'' if state['total_known'] else '约'}{total_pages}页"
+    if searching:
+        page_info += " 搜索中..."
     full_line = search_display + page_info
     stdscr.addstr(1, 0, full_line)
 
@@ -225,18 +442,56 @@ def _update_scroll_offset(state, max_display_items):
         state['scroll_offset'] = current_row - max_display_items + 1
 
 
-def _load_tab_data(tab, state):
-    """加载标签页数据"""
-    from skill_hub.utils.skill_mng import get_skills, get_repos
+def _clear_loaded(state):
+    """搜索出错时清空结果，同时丢弃可能已不可用的前缀结果"""
+    state['match_stack'].clear()
+    state['filtered_data'] = []
+    state['total_count'] = 0
+    state['total_known'] = True
 
-    if tab['type'] == 'skill':
-        data, total = get_skills(state['search_text'], state['page'], PAGE_SIZE)
-        state['filtered_data'] = data
-        state['total_count'] = total
-    else:
-        data, total = get_repos(state['search_text'], state['page'], PAGE_SIZE)
-        state['filtered_data'] = data
-        state['total_count'] = total
+
+def _load_tab_data(tab, state, stale=None):
+    """
+    加载标签页数据，返回本次的搜索结果（出错时返回 None）
+    stale() 返回 True 时说明已有更新的请求，搜索完成后不再取页
+    match_stack 保存当前关键词各个前缀的搜索结果：输入新字符时在上一次结果中继续筛选，
+    退格时直接取回对应前缀的结果，不再扫描整个目录
+    """
+    from skill_hub.utils.skill_mng import match_skills, match_repos
+
+    match = match_skills if tab['type'] == 'skill' else match_repos
+    search_text = state['search_text']
+    stack = state['match_stack']
+
+    # 丢弃不是当前关键词前缀的结果（退格或清空后）
+    while stack and not search_text.lower().startswith(stack[-1].search.lower()):
+        stack.pop()
+
+    try:
+        result = match(search_text, within=stack[-1] if stack else None)
+    except Exception:
+        _clear_loaded(state)
+        return None
+
+    # 空关键词的结果是整个目录，不作为细化的基础
+    if search_text and (not stack or stack[-1] is not result):
+        if stack and stack[-1].version != result.version:
+            # 目录已更新，旧版本的结果不再可用
+            stack.clear()
+        stack.append(result)
+        del stack[:-MATCH_STACK_SIZE]
+
+    if stale is not None and stale():
+        return result
+    state['filtered_data'] = result.page(state['page'], PAGE_SIZE)
+    if not state['filtered_data'] and state['page'] > 1:
+        # 按估算总数翻到了末尾之后，退回上一页
+        state['page'] -= 1
+        state['filtered_data'] = result.page(state['page'], PAGE_SIZE)
+    # 宽泛的关键词只计算到当前页，总数先用估算值
+    state['total_known'] = result.total_known
+    state['total_count'] = result.total if result.total_known else result.estimated_total()
+    return result
 
 
 def _show_detail_view(stdscr, tab, selected_item):
@@ -329,39 +584,46 @@ def _parse_skill_info(skill_str):
     return None, skill_str
 
 
-def _view_skill_md_online(stdscr, skill_str):
-    """从线上查看SKILL.md"""
-    skill_name, repo = _parse_skill_info(skill_str)
-
+def _skill_md_url(skill_str):
+    """技能行对应的线上 SKILL.md 地址，无法解析时返回 None"""
+    skill_name, repo = _parse_skill_info(skill_str.split('\t', 1)[0].strip())
     if not skill_name or not repo:
-        stdscr.clear()
-        stdscr.addstr(0, 0, "无法解析技能信息")
-        stdscr.addstr(2, 0, "按任意键返回...")
-        stdscr.refresh()
-        stdscr.getch()
-        return
-
+        return None
     repo_parts = repo.split('/')
     if len(repo_parts) != 2:
+        return None
+    owner, repo_name = repo_parts
+    return skill_md_url.format(owner=owner, repo=repo_name, skill_name=skill_name)
+
+
+def _prefetch_previews(tab, state):
+    """在后台预取光标附近几行技能的 SKILL.md，打开预览时直接读取缓存"""
+    if tab['type'] != 'skill':
+        return
+    data = state['filtered_data']
+    row = state['current_row']
+    nearby = data[row:row + PREFETCH_AFTER + 1] + data[max(0, row - PREFETCH_BEFORE):row]
+    md_cache.prefetch(_skill_md_url(item) for item in nearby)
+
+
+def _view_skill_md_online(stdscr, skill_str):
+    """从线上查看SKILL.md，已缓存时直接显示缓存内容"""
+    url = _skill_md_url(skill_str)
+    if url is None:
         stdscr.clear()
-        stdscr.addstr(0, 0, "无效的仓库格式")
+        stdscr.addstr(0, 0, "无法解析技能信息")
         stdscr.addstr(2, 0, "按任意键返回...")
         stdscr.refresh()
         stdscr.getch()
         return
 
-    owner, repo_name = repo_parts
-    url = skill_md_url.format(owner=owner, repo=repo_name, skill_name=skill_name)
-
     stdscr.clear()
     stdscr.addstr(0, 0, f"正在下载: {url}")
     stdscr.addstr(1, 0, "请稍候...")
     stdscr.refresh()
 
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        content = response.text
+        content = md_cache.get(url)
         show_file_content(stdscr, f"SKILL.md - {skill_str}", content)
     except Exception as e:
         stdscr.clear()
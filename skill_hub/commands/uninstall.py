@@ -6,6 +6,8 @@ import os
 import shutil
 from pathlib import Path
 
+from skill_hub.utils import install_manifest
+
 
 def uninstall_skill(target=None):
     """
@@ -38,6 +40,7 @@ def uninstall_all_skills_from_repo(repo):
     
     try:
         shutil.rmtree(repo_dir)
+        install_manifest.forget(repo)
         print(f"已卸载仓库 {repo} 的所有技能")
     except Exception as e:
         print(f"卸载仓库 {repo} 时出错: {e}")
@@ -54,6 +57,7 @@ def uninstall_specific_skill(skill_name, repo):
     
     try:
         shutil.rmtree(skill_dir)
+        install_manifest.forget(repo, skill_name)
         print(f"已卸载技能: {skill_name}@{repo}")
     except Exception as e:
         print(f"卸载技能 {skill_name}@{repo} 时出错: {e}")
\ No newline at end of file
@@ -9,6 +9,8 @@ import subprocess
 from pathlib import Path
 import requests
 
+from skill_hub.utils import repo_fetch, install_manifest
+
 
 def update_skill(target=None):
     """
@@ -43,19 +45,19 @@ def update_all_skills_from_repo(repo):
     owner, repo_name = repo_parts
     repo_dir = skill_hub_dir / owner / repo_name
     
+    # 远程最新提交与安装时记录的一致时跳过，只需查询一次远程
+    remote_commit = install_manifest.remote_head(repo)
+    if repo_dir.exists() and remote_commit and install_manifest.recorded(repo) == remote_commit:
+        print(f"仓库 {repo} 已是最新 ({remote_commit[:7]})，跳过更新")
+        return
+    
     print(f"正在更新仓库 {repo} 的所有技能...")
     
     # 直接从GitHub克隆整个仓库
     temp_dir = Path(tempfile.mkdtemp())
     try:
-        repo_url = f"https://github.com/{repo}"
-        result = subprocess.run(
-            ['git', 'clone', '--depth', '1', '--quiet', repo_url, str(temp_dir)],  # 添加 --depth 1 --quiet 选项
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=60  # 60秒超时
-        )
+        # 获取最新内容并导出到临时目录（默认从本地镜像缓存增量获取）
+        commit = repo_fetch.checkout(repo, temp_dir)
         
         # 删除目标目录并替换为新的仓库内容
         if repo_dir.exists():
@@ -66,6 +68,7 @@ def update_all_skills_from_repo(repo):
         
         # 将临时目录的内容移动到目标位置
         shutil.move(str(temp_dir), str(repo_dir))
+        install_manifest.record(repo, commit)
         
         print(f"已更新仓库: {repo}")
         
@@ -97,19 +100,19 @@ def update_specific_skill(skill_name, repo):
     owner, repo_name = repo_parts
     skill_dir = skill_hub_dir / owner / repo_name / skill_name
     
+    # 远程最新提交与安装时记录的一致时跳过，只需查询一次远程
+    remote_commit = install_manifest.remote_head(repo)
+    if skill_dir.exists() and remote_commit and install_manifest.recorded(repo, skill_name) == remote_commit:
+        print(f"技能 {skill_name}@{repo} 已是最新 ({remote_commit[:7]})，跳过更新")
+        return
+    
     print(f"正在更新技能 {skill_name}@{repo}...")
     
     # 从GitHub克隆仓库到临时目录
     temp_dir = Path(tempfile.mkdtemp())
     try:
-        repo_url = f"https://github.com/{repo}"
-        result = subprocess.run(
-            ['git', 'clone', '--depth', '1', '--quiet', repo_url, str(temp_dir)],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=60  # 60秒超时
-        )
+        # 获取最新内容，只导出该技能的目录
+        commit = repo_fetch.checkout(repo, temp_dir, [skill_name])
 
         # 如果存在则删除后重新创建
         if skill_dir.exists():
@@ -129,6 +132,7 @@ def update_specific_skill(skill_name, repo):
                     shutil.copytree(item, dest_item)
                 else:
                     shutil.copy2(item, dest_item)
+            install_manifest.record(repo, commit, skill_name)
             print(f"已更新技能: {skill_name}@{repo}")
         else:
             # 在仓库中查找指定的技能目录
@@ -138,6 +142,7 @@ def update_specific_skill(skill_name, repo):
                     source_skill_dir = Path(root)
                     # 复制技能目录
                     shutil.copytree(source_skill_dir, skill_dir)
+                    install_manifest.record(repo, commit, skill_name)
                     print(f"已更新技能: {skill_name}@{repo}")
                     found = True
                     break
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+编译后的二进制目录格式 - 把合并后的目录行写成偏移表 + UTF-8 数据块 + 小写数据块，
+搜索时用 mmap 映射文件并直接在字节上查找，只在需要显示时才解码对应的行
+
+文件结构（整数均为本机字节序的 32 位无符号整数）:
+    魔数 | 头部长度 | JSON 头部 | 填充到 4 字节对齐
+    原始行偏移表 (rows + 1) | 小写行偏移表 (rows + 1) | 隐藏行号 (hidden)
+    按热门度排列的行号 (rows) | 每行的名次 (rows) | 每行的热门度加分 (rows，32 位浮点数)
+    原始行数据块 | 小写行数据块
+每行在数据块中以换行符结尾，关键词不含换行符，因此查找结果不会跨行
+"""
+
+import os
+import json
+import mmap
+import struct
+import bisect
+import itertools
+import threading
+from array import array
+
+_MAGIC = b'SKHB'
+FORMAT_VERSION = 2
+
+# 偏移量用 32 位整数保存，数据块不能超过该大小
+_MAX_BLOB_SIZE = 2 ** 32 - 1
+
+
+class MappedLines:
+    """映射文件中的一组行，按行号读取时才解码，不为每一行创建 Python 对象"""
+
+    def __init__(self, mm, offsets, base):
+        self._mm = mm
+        self._offsets = offsets
+        self._base = base
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def _row(self, row):
+        base = self._base
+        return self._mm[base + self._offsets[row]:base + self._offsets[row + 1] - 1].decode('utf-8')
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._row(row) for row in range(*item.indices(len(self)))]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError(item)
+        return self._row(item)
+
+    def __iter__(self):
+        return map(self._row, range(len(self)))
+
+    def scan(self, search, start, stop):
+        """在 [start, stop) 行中查找包含 search 的行，返回按行号升序逐个产生的 RowScan"""
+        return RowScan(self, search.encode('utf-8'), start, stop)
+
+
+class RowScan:
+    """
+    用 bytes 查找在数据块中逐个定位包含关键词的行，跳过的行不解码
+    len() 为查找范围的行数，scanned 为目前已经查找过的行数，用于估算匹配总数
+    """
+
+    def __init__(self, lines, needle, start, stop):
+        self._lines = lines
+        self._needle = needle
+        self._start = start
+        self._stop = stop
+        self.scanned = 0
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __iter__(self):
+        lines = self._lines
+        mm, offsets, base = lines._mm, lines._offsets, lines._base
+        position = base + offsets[self._start]
+        end = base + offsets[self._stop]
+        while True:
+            found = mm.find(self._needle, position, end)
+            if found < 0:
+                self.scanned = len(self)
+                return
+            row = bisect.bisect_right(offsets, found - base, self._start, self._stop + 1) - 1
+            self.scanned = row - self._start + 1
+            yield row
+            position = base + offsets[row + 1]
+
+
+class CompiledCatalog:
+    """
+    已映射的编译目录：lines / lower_lines 为 MappedLines，hidden 为隐藏行号集合，
+    order / ranks / bonus 为映射的热门度排序、名次和加分数组
+    """
+
+    def __init__(self, mm, header, lines, lower_lines, hidden, order, ranks, bonus):
+        self._mm = mm
+        self.layer_counts = header['layers']
+        self.lines = lines
+        self.lower_lines = lower_lines
+        self.hidden = hidden
+        self.order = order
+        self.ranks = ranks
+        self.bonus = bonus
+
+
+def _offsets(encoded_lines):
+    """每行（含结尾换行符）在数据块中的起始偏移，最后一个为数据块长度"""
+    # 不使用 accumulate 的 initial 参数（Python 3.8 才支持）
+    offsets = array('I', [0])
+    offsets.extend(itertools.accumulate(len(line) + 1 for line in encoded_lines))
+    return offsets
+
+
+def rank_positions(order):
+    """热门度排序的逆映射：每行的名次"""
+    ranks = array('I', bytes(4 * len(order)))
+    for rank, row in enumerate(order):
+        ranks[row] = rank
+    return ranks
+
+
+def write(bin_path, signature, lines, hidden, layer_counts, order, bonus):
+    """
+    把合并后的目录行编译到 bin_path，返回是否成功（数据块过大时不编译）
+    :param signature: 各层文件签名，加载时与当前签名不一致即视为过期
+    :param order: 按热门度从高到低排列的行号
+    :param bonus: 每行的热门度加分
+    """
+    encoded = [line.encode('utf-8') for line in lines]
+    offsets = _offsets(encoded)
+    blob = b'\n'.join(encoded) + b'\n' if encoded else b''
+    del encoded
+    lower_encoded = [line.lower().encode('utf-8') for line in lines]
+    lower_offsets = _offsets(lower_encoded)
+    lower_blob = b'\n'.join(lower_encoded) + b'\n' if lower_encoded else b''
+    del lower_encoded
+    if max(len(blob), len(lower_blob)) > _MAX_BLOB_SIZE:
+        return False
+
+    ranks = rank_positions(order)
+    header = json.dumps({
+        'version': FORMAT_VERSION,
+        'signature': signature,
+        'rows': len(lines),
+        'layers': list(layer_counts),
+        'hidden': len(hidden),
+    }).encode('utf-8')
+    padding = b'\0' * (-(len(_MAGIC) + 4 + len(header)) % 4)
+
+    # 先写临时文件再改名，读取方不会映射到写了一半的文件；调用方应为每个签名使用不同的 bin_path，
+    # 不要覆盖正在被映射的旧文件（Windows 上会失败）
+    tmp_path = bin_path.with_name(f"{bin_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_MAGIC + struct.pack('<I', len(header)) + header + padding)
+            f.write(offsets.tobytes())
+            f.write(lower_offsets.tobytes())
+            f.write(array('I', sorted(hidden)).tobytes())
+            f.write(array('I', order).tobytes())
+            f.write(ranks.tobytes())
+            f.write(array('f', bonus).tobytes())
+            f.write(blob)
+            f.write(lower_blob)
+        os.replace(tmp_path, bin_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return True
+
+
+def load(bin_path, signature):
+    """映射编译目录，文件不存在、已损坏或签名不一致时返回 None"""
+    try:
+        with open(bin_path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        if mm[:len(_MAGIC)] != _MAGIC:
+            return None
+        header_start = len(_MAGIC) + 4
+        header_length, = struct.unpack('<I', mm[len(_MAGIC):header_start])
+        header = json.loads(mm[header_start:header_start + header_length].decode('utf-8'))
+        if header.get('version') != FORMAT_VERSION or header.get('signature') != signature:
+            return None
+
+        rows, hidden_count = header['rows'], header['hidden']
+        position = header_start + header_length
+        position += -position % 4
+        view = memoryview(mm)
+        offsets = view[position:position + (rows + 1) * 4].cast('I')
+        position += (rows + 1) * 4
+        lower_offsets = view[position:position + (rows + 1) * 4].cast('I')
+        position += (rows + 1) * 4
+        hidden = set(view[position:position + hidden_count * 4].cast('I'))
+        position += hidden_count * 4
+        order = view[position:position + rows * 4].cast('I')
+        position += rows * 4
+        ranks = view[position:position + rows * 4].cast('I')
+        position += rows * 4
+        bonus = view[position:position + rows * 4].cast('f')
+        position += rows * 4
+        lower_base = position + offsets[rows]
+        if lower_base + lower_offsets[rows] != len(mm):
+            return None
+    except (ValueError, KeyError, TypeError, struct.error):
+        return None
+
+    lines = MappedLines(mm, offsets, position)
+    lower_lines = MappedLines(mm, lower_offsets, lower_base)
+    return CompiledCatalog(mm, header, lines, lower_lines, hidden, order, ranks, bonus)
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite 目录后端 - 把 skill.list / repo.sort 载入本地 SQLite 数据库，用 FTS5 全文索引搜索
+只依赖 Python 自带的 sqlite3；当前 SQLite 不支持 FTS5 trigram 分词器时不可用
+"""
+
+import sqlite3
+import threading
+
+from skill_hub.utils import catalog_search
+
+# 每个线程各自持有数据库连接: 数据库路径 -> 连接
+_local = threading.local()
+_available = None
+
+# 目录数据按 catalog（skill / repo）区分；entries_fts 是 entries 的外部内容全文索引，
+# trigram 分词器支持任意子串匹配且不区分大小写
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    catalog TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    line TEXT NOT NULL,
+    UNIQUE (catalog, line)
+);
+CREATE INDEX IF NOT EXISTS entries_position ON entries (catalog, position);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    line, content='entries', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts (rowid, line) VALUES (new.id, new.line);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, line) VALUES ('delete', old.id, old.line);
+END;
+CREATE TABLE IF NOT EXISTS catalog_state (
+    catalog TEXT PRIMARY KEY,
+    signature TEXT NOT NULL
+);
+"""
+
+# trigram 分词器只能匹配至少 3 个字符的关键词，更短的关键词用 LIKE 查找
+_MIN_MATCH_LENGTH = 3
+
+
+def _line_field(line, field):
+    """SQL 函数 line_field(line, field)：目录行（小写）中字段限定 field 的值，与文件后端的解析一致"""
+    return catalog_search.field_of(line.lower(), field)
+
+
+def _like_pattern(value):
+    return '%' + value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def available():
+    """当前 Python 自带的 SQLite 是否支持 FTS5 trigram 分词器"""
+    global _available
+    if _available is None:
+        try:
+            conn = sqlite3.connect(':memory:')
+            conn.execute("CREATE VIRTUAL TABLE t USING fts5(line, tokenize='trigram')")
+            conn.close()
+            _available = True
+        except sqlite3.Error:
+            _available = False
+    return _available
+
+
+def _connect(db_path):
+    """获取当前线程的数据库连接，首次连接时建表"""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(str(db_path))
+        conn.executescript(_SCHEMA)
+        conn.create_function('line_field', 2, _line_field)
+        connections[db_path] = conn
+    return conn
+
+
+def sync(db_path, catalog, signature, load_lines):
+    """
+    把目录内容增量同步到数据库：只删除消失的行、插入新增的行、更新位置变化的行
+    :param catalog: 目录名称 (skill / repo)
+    :param signature: 目录各层文件的签名，与上次同步时相同则直接返回
+    :param load_lines: 签名变化时调用，返回合并去重后的目录行
+    """
+    conn = _connect(db_path)
+    signature = repr(signature)
+    row = conn.execute("SELECT signature FROM catalog_state WHERE catalog = ?", (catalog,)).fetchone()
+    if row and row[0] == signature:
+        return
+
+    lines = load_lines()
+    existing = {
+        line: (entry_id, position)
+        for entry_id, line, position in conn.execute(
+            "SELECT id, line, position FROM entries WHERE catalog = ?", (catalog,))
+    }
+
+    wanted = {}
+    for position, line in enumerate(lines):
+        wanted.setdefault(line, position)
+
+    with conn:
+        conn.executemany(
+            "DELETE FROM entries WHERE id = ?",
+            [(entry_id,) for line, (entry_id, _) in existing.items() if line not in wanted])
+        conn.executemany(
+            "UPDATE entries SET position = ? WHERE id = ?",
+            [(position, existing[line][0]) for line, position in wanted.items()
+             if line in existing and existing[line][1] != position])
+        conn.executemany(
+            "INSERT INTO entries (catalog, position, line) VALUES (?, ?, ?)",
+            [(catalog, position, line) for line, position in wanted.items() if line not in existing])
+        conn.execute(
+            "INSERT OR REPLACE INTO catalog_state (catalog, signature) VALUES (?, ?)",
+            (catalog, signature))
+
+
+class DbSearchResult:
+    """数据库中的一次搜索，总数和每一页都按需查询"""
+
+    def __init__(self, db_path, catalog, search, version=None):
+        self.db_path = db_path
+        self.catalog = catalog
+        self.search = search
+        # 查询时数据库中目录的版本（同步时的各层文件签名）
+        self.version = version
+        self._total = None
+
+    def _where(self):
+        """
+        返回 (FROM/WHERE 子句, 参数, 是否按全文匹配的相关度排序)
+        关键词按与文件后端相同的规则解析（catalog_search.Query）：整行关键词和字段限定的值都必须出现在行中，
+        至少 3 个字符的用全文索引匹配，更短的用 LIKE；字段限定再用 line_field() 检查所在字段
+        """
+        query = catalog_search.Query(self.search)
+        values = ([query.text] if query.text else []) + [value for _, value in query.filters]
+        phrases = []
+        conditions = ["e.catalog = ?"]
+        params = [self.catalog]
+        for value in values:
+            if len(value) >= _MIN_MATCH_LENGTH:
+                phrases.append('"' + value.replace('"', '""') + '"')
+            else:
+                conditions.append("e.line LIKE ? ESCAPE '\\'")
+                params.append(_like_pattern(value))
+        for field, value in query.filters:
+            conditions.append("instr(line_field(e.line, ?), ?) > 0")
+            params.extend([field, value])
+
+        if not phrases:
+            return "FROM entries e WHERE " + " AND ".join(conditions), params, False
+        # CROSS JOIN 固定先查全文索引再按主键取行，避免 SQLite 先扫描整个目录
+        return ("FROM entries_fts CROSS JOIN entries e ON e.id = entries_fts.rowid "
+                "WHERE entries_fts MATCH ? AND " + " AND ".join(conditions),
+                [" AND ".join(phrases)] + params, len(query.text) >= _MIN_MATCH_LENGTH)
+
+    @property
+    def total(self):
+        if self._total is None:
+            clause, params, _ = self._where()
+            self._total = _connect(self.db_path).execute(f"SELECT count(*) {clause}", params).fetchone()[0]
+        return self._total
+
+    @property
+    def total_known(self):
+        # COUNT 走索引，总数总是精确计算
+        return True
+
+    def estimated_total(self):
+        return self.total
+
+    def iter_lines(self, size=200):
+        """按目录顺序逐页读取匹配的行"""
+        clause, params, _ = self._where()
+        offset = 0
+        while True:
+            rows = _connect(self.db_path).execute(
+                f"SELECT e.line {clause} ORDER BY e.position LIMIT ? OFFSET ?",
+                params + [size, offset]).fetchall()
+            for row in rows:
+                yield row[0]
+            if len(rows) < size:
+                return
+            offset += size
+
+    def refines(self, search):
+        # 数据库查询本身足够快，不做结果集细化
+        return False
+
+    def page(self, page=1, size=50):
+        """返回指定页的行，全文匹配按相关度排序，其余按目录顺序"""
+        clause, params, ranked = self._where()
+        order = "entries_fts.rank, e.position" if ranked else "e.position"
+        cursor = _connect(self.db_path).execute(
+            f"SELECT e.line {clause} ORDER BY {order} LIMIT ? OFFSET ?",
+            params + [size, (page - 1) * size])
+        return [row[0] for row in cursor]
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+目录增量更新 - 服务器为目录文件发布版本号和逐版本的差异文件，客户端只下载自己版本之后的差异
+
+服务器上目录文件 {url} 旁边的文件:
+    {url}.version     当前版本，一行 "<版本号> <完整文件的 sha256>"，版本号从 1 开始逐次加 1
+    {url}.delta/<N>   从版本 N-1 到版本 N 的差异，每行一个操作:
+                          -<行号>\t<行内容>  删除一行，行号为该行在版本 N-1 中的位置（从 0 开始）
+                          +<行号>\t<行内容>  插入一行，行号为该行在版本 N 中的位置（从 0 开始）
+                      删除按位置进行，目录中有重复的行时也不会删错
+目录文件每行以换行符结尾；应用差异后整个文件的 sha256 与 .version 中的一致才算成功，
+否则（差异缺失、内容对不上）客户端退回完整下载
+"""
+
+import difflib
+import hashlib
+
+
+class DeltaError(Exception):
+    """差异无法应用到本地目录"""
+
+
+def parse_version(text):
+    """解析 .version 文件内容，返回 (版本号, sha256)"""
+    version, checksum = text.split()
+    return int(version), checksum.lower()
+
+
+def format_version(version, checksum):
+    return f"{version} {checksum}\n"
+
+
+def checksum(data):
+    """目录文件内容（bytes）的 sha256"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def split_lines(data):
+    """把目录文件内容（bytes）切分为行（str），不含换行符"""
+    text = data.decode('utf-8')
+    lines = text.split('\n')
+    if lines and lines[-1] == '':
+        lines.pop()
+    return lines
+
+
+def join_lines(lines):
+    """把行重新拼成目录文件内容（bytes），每行以换行符结尾"""
+    return ''.join(line + '\n' for line in lines).encode('utf-8')
+
+
+def apply_delta(lines, delta):
+    """
+    把一个版本的差异应用到目录行，返回新版本的行
+    :param delta: 差异文件的内容（str）
+    """
+    removals = set()
+    additions = []
+    for op in delta.split('\n'):
+        if not op:
+            continue
+        row, tab, line = op[1:].partition('\t')
+        if op[0] not in '-+' or not tab or not row.isdigit():
+            raise DeltaError(f"无法解析的差异行: {op[:80]}")
+        if op[0] == '-':
+            row = int(row)
+            if row >= len(lines) or lines[row] != line:
+                raise DeltaError(f"要删除的行在本地目录中不存在: {op[:80]}")
+            removals.add(row)
+        else:
+            additions.append((int(row), line))
+
+    kept = [line for row, line in enumerate(lines) if row not in removals]
+
+    # 按新版本中的行号把插入的行合并到保留的行之间
+    additions.sort(key=lambda item: item[0])
+    result = []
+    pending = iter(additions)
+    addition = next(pending, None)
+    for line in kept:
+        while addition is not None and addition[0] == len(result):
+            result.append(addition[1])
+            addition = next(pending, None)
+        result.append(line)
+    while addition is not None and addition[0] == len(result):
+        result.append(addition[1])
+        addition = next(pending, None)
+    if addition is not None:
+        raise DeltaError(f"插入位置超出范围: {addition[0]}")
+    return result
+
+
+def make_delta(old_lines, new_lines):
+    """生成从 old_lines 到 new_lines 的差异文件内容（发布目录时使用）"""
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag in ('delete', 'replace'):
+            ops.extend(f"-{row}\t{old_lines[row]}" for row in range(i1, i2))
+        if tag in ('insert', 'replace'):
+            ops.extend(f"+{row}\t{new_lines[row]}" for row in range(j1, j2))
+    return ''.join(op + '\n' for op in ops)
@@ -0,0 +1,814 @@
+# -*- coding: utf-8 -*-
+"""
+目录搜索 - 文件后端的搜索引擎：关键词和字段限定的解析（Query）、倒排索引和拼写纠错词表、
+多层目录的合并与热门度排序、编译目录（见 catalog_bin.py）的映射，以及惰性分页的搜索结果
+目录文件的下载、来源配置和各层文件的定位见 skill_mng.py；SQLite 后端（catalog_db.py）使用同一套关键词解析
+"""
+
+import os
+import re
+import glob
+import heapq
+import pickle
+import hashlib
+import itertools
+import threading
+from array import array
+from collections import Counter
+from pathlib import Path
+
+skill_hub_dir = Path.home() / '.skill-hub'
+
+# ~/.skill-hub 之外的目录文件（path 来源）的索引保存位置
+index_cache_dir = skill_hub_dir / 'cache' / 'index'
+
+# 索引把每行切分成词（字母、数字、下划线、中文等连续字符），记录 词 -> 行号列表
+_token_split = re.compile(r'[^\w]+').split
+INDEX_VERSION = 2
+
+# 已解析的目录缓存: 目录文件路径 -> Catalog（搜索线程和其他线程可能同时访问，解析时加锁）
+_catalogs = {}
+_catalogs_lock = threading.RLock()
+
+
+def _index_path(file_path):
+    """
+    目录文件对应的索引文件，例如 skill.list -> skill.idx
+    ~/.skill-hub 之外的文件（path 来源，如团队共享目录）不写入其所在目录，按路径保存在 index_cache_dir 中
+    """
+    if file_path.parent != skill_hub_dir:
+        key = hashlib.sha1(str(file_path.resolve()).encode('utf-8')).hexdigest()
+        return index_cache_dir / f"{key}.idx"
+    return file_path.with_suffix('.idx')
+
+
+def file_signature(file_path):
+    """文件签名 (大小, 修改时间)，用于判断索引是否过期"""
+    stat = file_path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _make_index(lines):
+    """
+    建立索引数据：postings 为 词 -> 行号，fuzzy 为拼写纠错用的词表（见 _fuzzy_vocabulary）
+    """
+    postings = {}
+    for row, line in enumerate(lines):
+        for token in set(_token_split(line.lower())):
+            if token:
+                rows = postings.get(token)
+                if rows is None:
+                    postings[token] = rows = array('I')
+                rows.append(row)
+    return {
+        'rows': len(lines),
+        'postings': {token: rows.tobytes() for token, rows in postings.items()},
+        'fuzzy': _fuzzy_vocabulary(postings),
+    }
+
+
+def build_index(file_path, lines=None, quiet=False):
+    """为目录文件建立倒排索引并写入同名 .idx 文件，返回索引数据"""
+    try:
+        if lines is None:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                lines = [line.strip() for line in f if line.strip()]
+
+        index = {'version': INDEX_VERSION, 'signature': file_signature(file_path)}
+        index.update(_make_index(lines))
+
+        # 先写临时文件再替换，避免并发读取到半个索引
+        index_path = _index_path(file_path)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(index, f, protocol=4)
+        os.replace(tmp_path, index_path)
+        return index
+    except Exception as e:
+        if not quiet:
+            print(f"建立索引 {file_path.name} 时出错: {e}")
+        return None
+
+
+def _load_index(file_path):
+    """加载与目录文件匹配的索引，不存在或已过期返回 None"""
+    try:
+        with open(_index_path(file_path), 'rb') as f:
+            index = pickle.load(f)
+    except Exception:
+        return None
+
+    if index.get('version') != INDEX_VERSION or index.get('signature') != file_signature(file_path):
+        return None
+    return index
+
+
+def _candidate_rows(index, search_lower):
+    """
+    用索引找出可能包含关键词的行号（升序）
+    关键词的每个词片段都必须是该行某个词的子串；返回 None 表示无法用索引缩小范围
+    """
+    pieces = [piece for piece in _token_split(search_lower) if piece]
+    if not pieces:
+        return None
+
+    postings = index['postings']
+    candidates = None
+    # 先处理最长的片段，命中的词最少
+    for piece in sorted(set(pieces), key=len, reverse=True):
+        matched = [data for token, data in postings.items() if piece in token]
+        # 命中行数超过一半时索引几乎无法缩小范围，交给逐行匹配
+        if sum(len(data) for data in matched) // 4 > index['rows'] // 2:
+            continue
+        rows = set()
+        for data in matched:
+            token_rows = array('I')
+            token_rows.frombytes(data)
+            rows.update(token_rows)
+        candidates = rows if candidates is None else candidates & rows
+        if not candidates:
+            return []
+    if candidates is None:
+        return None
+    return sorted(candidates)
+
+# 行数少于该值的目录层（如自定义列表）直接逐行匹配，不建立索引
+INDEX_MIN_ROWS = 2000
+
+# 打分关键词少于该长度时（如单个字母）几乎匹配整个目录，按热门度顺序惰性分页，不做排序
+RANK_MIN_LENGTH = 2
+
+# 包含关键词的结果少于该数量时，再用拼写纠错补充模糊匹配结果
+FUZZY_MAX_MATCHES = 20
+# 参与拼写纠错的关键词片段最短长度
+FUZZY_MIN_LENGTH = 3
+# 每个关键词片段按共有三元组数选出的候选词上限（只对这些词计算编辑距离），以及最多补充的模糊匹配行数
+FUZZY_MAX_TOKENS = 200
+FUZZY_MAX_ROWS = 500
+
+
+def _trigrams(text):
+    """文本的三元组集合，首尾补空格使短词和词首也有三元组"""
+    text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _similarity(grams_a, grams_b):
+    """两个三元组集合的 Jaccard 相似度"""
+    if not grams_a or not grams_b:
+        return 0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+def _fuzzy_vocabulary(tokens):
+    """
+    拼写纠错用的词表：words 为参与纠错的词（不含纯数字和单个字符），grams 为 三元组 -> 包含它的词序号
+    随索引一起建立和保存，搜索时不再遍历整个词表
+    """
+    words = [token for token in tokens if len(token) > 1 and not token.isdigit()]
+    grams = {}
+    for number, word in enumerate(words):
+        for gram in _trigrams(word):
+            numbers = grams.get(gram)
+            if numbers is None:
+                grams[gram] = numbers = array('I')
+            numbers.append(number)
+    return {'words': words, 'grams': {gram: numbers.tobytes() for gram, numbers in grams.items()}}
+
+
+def _fuzzy_words(vocabulary, piece):
+    """
+    词表中与关键词片段拼写相近（编辑距离不超过 1，片段较长时为 2）的词 -> 与片段的三元组相似度
+    先按与片段共有的三元组数选出最多 FUZZY_MAX_TOKENS 个候选词，只对它们计算编辑距离
+    """
+    words, grams = vocabulary['words'], vocabulary['grams']
+    piece_grams = _trigrams(piece)
+    counts = Counter()
+    for gram in piece_grams:
+        data = grams.get(gram)
+        if data:
+            numbers = array('I')
+            numbers.frombytes(data)
+            counts.update(numbers)
+
+    limit = 1 if len(piece) <= 5 else 2
+    matches = {}
+    for number, _ in counts.most_common(FUZZY_MAX_TOKENS):
+        word = words[number]
+        if _edit_distance(piece, word, limit) <= limit:
+            matches[word] = _similarity(piece_grams, _trigrams(word))
+    return matches
+
+
+# 可以在关键词中使用的字段限定，例如 owner:anthropics repo:skills name:pdf desc:excel
+QUERY_FIELDS = ('name', 'owner', 'repo', 'desc')
+_qualifier = re.compile(r'(?<!\S)(name|owner|repo|desc):("[^"]*"?|\S*)', re.IGNORECASE)
+
+
+class Query:
+    """
+    解析后的搜索条件：text 为在整行中查找的关键词，filters 为 [(字段, 值)] 字段限定
+    没有字段限定时 text 与原关键词（小写）完全一致
+    """
+
+    __slots__ = ('text', 'filters')
+
+    def __init__(self, search):
+        filters = []
+
+        def collect(match):
+            value = match.group(2).strip('"').lower()
+            if value:
+                filters.append((match.group(1).lower(), value))
+            return ' '
+
+        text = _qualifier.sub(collect, search)
+        if text != search:
+            text = ' '.join(text.split())
+        self.text = text.lower()
+        self.filters = filters
+
+    def __bool__(self):
+        return bool(self.text or self.filters)
+
+    def __eq__(self, other):
+        return self.text == other.text and sorted(self.filters) == sorted(other.filters)
+
+    def implies(self, other):
+        """本条件的匹配结果是否一定是 other 匹配结果的子集"""
+        if other.text not in self.text:
+            return False
+        return all(any(field == own_field and value in own_value for own_field, own_value in self.filters)
+                   for field, value in other.filters)
+
+    @property
+    def term(self):
+        """用于打分的关键词：整行关键词，没有时用名称限定"""
+        return self.text or next((value for field, value in self.filters if field == 'name'), '')
+
+
+def _edit_distance(a, b, limit):
+    """编辑距离（交换相邻两个字符算一次编辑），超过 limit 时提前返回 limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if before is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                value = min(value, before[j - 2] + 1)
+            current.append(value)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def line_key(line):
+    """目录行的去重键：第一个制表符前的部分，如 skill@owner/repo 或 owner/repo"""
+    return line.split('\t', 1)[0].strip().lower()
+
+
+def _line_fields(line):
+    """
+    目录行（小写）的 (名称, 所有者, 仓库)：技能行 skill@owner/repo，仓库行 owner/repo，
+    名称分别取技能名和仓库名
+    """
+    key = line.split('\t', 1)[0]
+    name, _, source = key.rpartition('@')
+    owner, _, repo = source.partition('/')
+    return name or repo, owner, repo
+
+
+def field_of(line, field):
+    """目录行（小写）指定字段的值，描述（desc）即第一个制表符之后的内容"""
+    if field == 'desc':
+        return line.partition('\t')[2]
+    return _line_fields(line)[QUERY_FIELDS.index(field)]
+
+
+def _size(rows):
+    """候选行号来源的行数，惰性结果用估算值，避免为了计数算完全部候选行"""
+    return rows.estimate() if isinstance(rows, _LazyRows) else len(rows)
+
+
+class _LazyRows:
+    """
+    按需计算的匹配行号序列：按顺序检查各段候选行，只算到调用方需要的位置为止
+    已算出的行号缓存在紧凑数组中，可重复遍历；len() 才会算完全部候选行
+    候选行可以是行号序列，也可以是在映射数据中直接查找的 RowScan（带 scanned 进度）
+    """
+
+    def __init__(self, parts, predicate):
+        self._parts = list(parts)
+        self._candidate_count = sum(_size(part) for part in self._parts)
+        self._source = self._walk()
+        self._predicate = predicate
+        self._rows = array('I')
+        self._finished = 0
+        self._current = None
+        self._consumed = 0
+        self.done = False
+
+    def _walk(self):
+        """依次产生各段候选行，记录已完成的段和当前段的进度"""
+        for part in self._parts:
+            self._current, self._consumed = part, 0
+            for row in part:
+                self._consumed += 1
+                yield row
+            self._finished += _size(part)
+            self._current = None
+
+    @property
+    def _scanned(self):
+        """已经检查过的候选行数"""
+        scanned = self._finished
+        if self._current is not None:
+            scanned += getattr(self._current, 'scanned', self._consumed)
+        return scanned
+
+    def _fill(self, count=None):
+        """继续检查候选行，直到缓存中至少有 count 个匹配（count 为 None 时检查全部）"""
+        rows = self._rows
+        predicate = self._predicate
+        for row in self._source:
+            if predicate(row):
+                rows.append(row)
+                if count is not None and len(rows) >= count:
+                    return
+        self.done = True
+
+    def at_least(self, count):
+        """是否至少有 count 个匹配，只计算到第 count 个为止"""
+        if len(self._rows) < count and not self.done:
+            self._fill(count)
+        return len(self._rows) >= count
+
+    def estimate(self):
+        """匹配总数：已算完时为精确值，否则按已检查候选行中的命中比例估算"""
+        if self.done or not self._scanned:
+            return len(self._rows)
+        return max(len(self._rows), round(len(self._rows) * self._candidate_count / self._scanned))
+
+    def __iter__(self):
+        position = 0
+        while True:
+            if position < len(self._rows):
+                yield self._rows[position]
+                position += 1
+            elif self.done:
+                return
+            else:
+                self._fill(position + 1)
+
+    def __len__(self):
+        if not self.done:
+            self._fill()
+        return len(self._rows)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            if item.stop is None or item.stop < 0:
+                self._fill()
+            else:
+                self.at_least(item.stop)
+        else:
+            self.at_least(item + 1 if item >= 0 else len(self))
+        return self._rows[item]
+
+
+class _CatalogLayer:
+    """目录中的一层（自定义列表或远程目录文件）"""
+
+    def __init__(self, file_path, offset, count):
+        self.file_path = file_path
+        self.offset = offset
+        self.count = count
+        self._index = None
+        self._fuzzy_index = None
+
+    def index(self, lower_lines):
+        """按需加载索引，缺失或过期时重新建立"""
+        if self._index is None:
+            index = None
+            if self.count >= INDEX_MIN_ROWS:
+                index = _load_index(self.file_path)
+                if index is None or index['rows'] != self.count:
+                    index = build_index(self.file_path, lower_lines[self.offset:self.offset + self.count])
+            self._index = index or {}
+        return self._index
+
+    def candidates(self, lower_lines, search_lower):
+        """本层可能包含关键词的全局行号"""
+        index = self.index(lower_lines)
+        rows = _candidate_rows(index, search_lower) if index else None
+        if rows is None:
+            if hasattr(lower_lines, 'scan'):
+                # 编译目录直接在映射的小写数据中查找，不逐行解码
+                return lower_lines.scan(search_lower, self.offset, self.offset + self.count)
+            return range(self.offset, self.offset + self.count)
+        return [self.offset + row for row in rows]
+
+    def fuzzy_candidates(self, lower_lines, pieces):
+        """
+        本层可能是拼写错误匹配的全局行号 -> 该行与关键词片段最接近的词的相似度
+        没有索引的小层在首次纠错时于内存中建立索引（不写入文件）
+        """
+        index = self.index(lower_lines)
+        if not index:
+            if self._fuzzy_index is None:
+                self._fuzzy_index = _make_index(lower_lines[self.offset:self.offset + self.count])
+            index = self._fuzzy_index
+
+        matches = []
+        for piece in pieces:
+            matches.extend(_fuzzy_words(index['fuzzy'], piece).items())
+        rows = {}
+        # 按相似度从低到高写入，同一行保留最接近的词的相似度
+        for word, similarity in sorted(matches, key=lambda item: item[1]):
+            word_rows = array('I')
+            word_rows.frombytes(index['postings'][word])
+            rows.update(dict.fromkeys(word_rows, similarity))
+        return {self.offset + row: similarity for row, similarity in rows.items()}
+
+
+def parse_layers(layer_paths):
+    """
+    读取目录各层文件，返回 (合并后的行, 隐藏行号集合, 各层行数)
+    靠前的层优先：后面层中与前面层去重键相同的行会被隐藏
+    """
+    all_lines = []
+    hidden = set()
+    layer_counts = []
+    seen = set()
+    for i, layer_path in enumerate(layer_paths):
+        with open(layer_path, 'r', encoding='utf-8') as f:
+            lines = [line.strip() for line in f if line.strip()]
+        offset = len(all_lines)
+        is_last = i == len(layer_paths) - 1
+        if seen or not is_last:
+            for row, line in enumerate(lines):
+                key = line_key(line)
+                if key in seen:
+                    hidden.add(offset + row)
+                elif not is_last:
+                    seen.add(key)
+        layer_counts.append(len(lines))
+        all_lines.extend(lines)
+    return all_lines, hidden, layer_counts
+
+
+def _bin_path(file_path, signature):
+    """
+    目录编译后的二进制文件，文件名带签名的哈希，例如 skill.list -> skill.list.<哈希>.bin
+    每次编译都写到新文件名：Windows 上无法替换或删除正在被映射的文件
+    """
+    digest = hashlib.sha1(repr(signature).encode('utf-8')).hexdigest()[:16]
+    return file_path.with_name(f"{file_path.name}.{digest}.bin")
+
+
+def _remove_old_bins(file_path, keep):
+    """尽力删除目录以前编译的 .bin 文件（包括不带哈希的旧文件名），仍被映射而删不掉的留到下次编译"""
+    old_paths = list(file_path.parent.glob(f"{glob.escape(file_path.name)}.*.bin"))
+    old_paths.append(file_path.with_name(file_path.name + '.bin'))
+    for old_path in old_paths:
+        if old_path == keep:
+            continue
+        try:
+            old_path.unlink()
+        except OSError:
+            pass
+
+
+def _rank_signal(line):
+    """目录行末尾可选的数字列（如安装量、星标数），至少有三列时才读取，没有时为 0"""
+    if line.count('\t') < 2:
+        return 0
+    try:
+        return float(line.rsplit('\t', 1)[1])
+    except ValueError:
+        return 0
+
+
+def _repo_positions(rank_paths):
+    """repo.sort 各层文件（合并、去掉隐藏行后）中 owner/repo -> 名次，以及仓库总数"""
+    if not rank_paths:
+        return {}, 0
+    lines, hidden, _ = parse_layers(rank_paths)
+    positions = {}
+    for row, line in enumerate(lines):
+        if row not in hidden:
+            positions.setdefault(line_key(line), len(positions))
+    return positions, len(positions)
+
+
+def rank_order(file_path, lines, rank_paths=None):
+    """
+    目录刷新时预先计算的热门度排序，返回 (按热门度从高到低排列的行号, 每行的热门度加分 0~1)
+    仓库目录按 repo.sort 的行顺序；技能按所属仓库在 repo.sort（各层文件为 rank_paths）中的名次，
+    同一仓库内按行末可选的数字列从大到小，再按目录顺序；不在 repo.sort 中的仓库排在最后，加分为 0
+    """
+    count = len(lines)
+    if file_path.name == 'repo.sort':
+        return range(count), [1 - row / count for row in range(count)]
+
+    positions, repo_count = _repo_positions(rank_paths)
+    repo_rows = []
+    for line in lines:
+        position = positions.get(line_key(line).rpartition('@')[2])
+        repo_rows.append(repo_count if position is None else position)
+    order = sorted(range(count), key=lambda row: (repo_rows[row], -_rank_signal(lines[row]), row))
+    bonus = [1 - position / repo_count if position < repo_count else 0 for position in repo_rows]
+    return order, bonus
+
+
+def compile_catalog(file_path, layer_paths, signature, rank_paths=None, quiet=False):
+    """
+    把目录的各层文件 layer_paths（签名为 signature）合并后编译为带签名哈希的 .bin 文件，
+    返回映射后的 CompiledCatalog，失败返回 None；编译成功后删除以前编译的 .bin 文件
+    """
+    from skill_hub.utils import catalog_bin
+
+    try:
+        bin_path = _bin_path(file_path, signature)
+        compiled = catalog_bin.load(bin_path, repr(signature))
+        if compiled is None:
+            lines, hidden, layer_counts = parse_layers(layer_paths)
+            order, bonus = rank_order(file_path, lines, rank_paths)
+            if not catalog_bin.write(bin_path, repr(signature), lines, hidden, layer_counts, order, bonus):
+                return None
+            compiled = catalog_bin.load(bin_path, repr(signature))
+        _remove_old_bins(file_path, bin_path)
+        return compiled
+    except Exception as e:
+        if not quiet:
+            print(f"编译目录 {file_path.name} 时出错: {e}")
+        return None
+
+
+class Catalog:
+    """
+    已解析的目录，各层文件签名不变时一直复用
+    优先映射编译后的 .bin 文件（原始行和小写行都按需解码），无法编译时退回内存中的字符串列表
+    目录由多层组成，靠前的层优先：后面层中与前面层去重键相同的行会被隐藏
+    order 为预先算好的热门度排序，默认顺序和排序结果的前几页只需读取它的开头
+    """
+
+    def __init__(self, file_path, layer_paths, signature, rank_paths=None):
+        from skill_hub.utils import catalog_bin
+
+        self.file_path = file_path
+        self.signature = signature
+        compiled = catalog_bin.load(_bin_path(file_path, signature), repr(signature))
+        if compiled is None:
+            compiled = compile_catalog(file_path, layer_paths, signature, rank_paths, quiet=True)
+        if compiled is not None:
+            self.lines = compiled.lines
+            self.lower_lines = compiled.lower_lines
+            self.hidden = compiled.hidden
+            self.order, self.ranks, self.bonus = compiled.order, compiled.ranks, compiled.bonus
+            layer_counts = compiled.layer_counts
+        else:
+            self.lines, self.hidden, layer_counts = parse_layers(layer_paths)
+            self.lower_lines = [line.lower() for line in self.lines]
+            order, bonus = rank_order(file_path, self.lines, rank_paths)
+            self.order = array('I', order)
+            self.ranks = catalog_bin.rank_positions(self.order)
+            self.bonus = array('f', bonus)
+
+        self.layers = []
+        offset = 0
+        for layer_path, count in zip(layer_paths, layer_counts):
+            self.layers.append(_CatalogLayer(layer_path, offset, count))
+            offset += count
+        self._field_indexes = {}
+
+    def name(self, row):
+        """某一行的名称（小写）"""
+        return _line_fields(self.lower_lines[row])[0]
+
+    def field_candidates(self, field, value):
+        """
+        用字段索引（字段值 -> 行号）找出该字段包含 value 的行号（升序）
+        字段索引首次使用时逐行建立，之后只扫描该字段的不同取值；desc 没有字段索引，用整行索引缩小范围
+        """
+        if field == 'desc':
+            return sorted(itertools.chain.from_iterable(
+                layer.candidates(self.lower_lines, value) for layer in self.layers))
+        index = self._field_indexes.get(field)
+        if index is None:
+            index = {}
+            column = QUERY_FIELDS.index(field)
+            for row, line in enumerate(self.lower_lines):
+                index.setdefault(_line_fields(line)[column], array('I')).append(row)
+            self._field_indexes[field] = index
+        rows = []
+        for field_value, value_rows in index.items():
+            if value in field_value:
+                rows.extend(value_rows)
+        return sorted(rows)
+
+    def fuzzy_find(self, query, exclude=()):
+        """
+        返回可能是拼写错误匹配的 行号 -> 相似度（不包含 exclude 中的行）：
+        行中有与某个关键词片段拼写相近的词，相似度取最接近的词；最多保留得分最高的 FUZZY_MAX_ROWS 行
+        """
+        pieces = {piece for piece in _token_split(query.text) if len(piece) >= FUZZY_MIN_LENGTH}
+        if not pieces:
+            return {}
+        similarities = {}
+        for layer in self.layers:
+            similarities.update(layer.fuzzy_candidates(self.lower_lines, pieces))
+        hidden = self.hidden
+        exclude = set(exclude)
+        rows = [row for row in similarities if row not in hidden and row not in exclude]
+        rows = heapq.nlargest(FUZZY_MAX_ROWS, rows, key=self.scorer(query, similarities))
+        return {row: similarities[row] for row in rows}
+
+    def scorer(self, query, fuzzy=None):
+        """
+        返回对行号打分的函数：名称完全匹配 > 名称前缀 > 名称包含 > 整行包含 > 模糊相似，再加热门度
+        fuzzy 为模糊匹配的 行号 -> 相似度（见 fuzzy_find）；只有字段限定、没有可打分的关键词时只按热门度排序
+        """
+        search_lower = query.term
+        fuzzy = fuzzy or {}
+        lower_lines = self.lower_lines
+        bonus, ranks = self.bonus, self.ranks
+
+        def score(row):
+            if not search_lower:
+                return bonus[row], -ranks[row]
+            line = lower_lines[row]
+            name = _line_fields(line)[0]
+            if name == search_lower or line.split('\t', 1)[0] == search_lower:
+                value = 100
+            elif name.startswith(search_lower):
+                value = 80
+            elif search_lower in name:
+                value = 60
+            elif search_lower in line:
+                value = 40
+            else:
+                value = 30 * fuzzy.get(row, 0)
+            value += 10 * bonus[row]
+            # 分数相同时热门度名次靠前的行优先
+            return value, -ranks[row]
+
+        return score
+
+    def find(self, query, rows=None):
+        """
+        返回满足搜索条件 (Query) 的行号，rows 不为空时只在这些行中查找
+        结果是惰性计算的 _LazyRows（没有条件且无隐藏行时为热门度排序本身），翻页只计算到需要的位置
+        不按得分排序的搜索按热门度顺序返回，按得分排序的搜索按目录顺序查找候选行
+        """
+        hidden = self.hidden
+        if not query:
+            if rows is not None:
+                return rows
+            if not hidden:
+                return self.order
+            return _LazyRows([self.order], lambda row: row not in hidden)
+
+        text = query.text
+        ranked = len(query.term) >= RANK_MIN_LENGTH
+        if rows is not None:
+            parts = [rows]
+        elif text and not ranked:
+            # 关键词很短时大部分行都匹配，直接按热门度顺序逐行检查，翻页只检查到当前页
+            parts = [self.order]
+        elif text:
+            parts = [layer.candidates(self.lower_lines, text) for layer in self.layers]
+        else:
+            # 只有字段限定时，从名称/所有者/仓库字段索引取候选行
+            field, value = min(query.filters, key=lambda item: (item[0] == 'desc', -len(item[1])))
+            candidates = self.field_candidates(field, value)
+            parts = [candidates if ranked else sorted(candidates, key=self.ranks.__getitem__)]
+
+        lower_lines = self.lower_lines
+        filters = query.filters
+
+        def matches(row):
+            if row in hidden:
+                return False
+            line = lower_lines[row]
+            if text not in line:
+                return False
+            return all(value in field_of(line, field) for field, value in filters)
+
+        return _LazyRows(parts, matches)
+
+
+class SearchResult:
+    """
+    一次搜索的匹配结果，记录所属目录版本、包含关键词的行号和拼写纠错得到的模糊匹配（行号 -> 相似度）
+    行号惰性计算：按热门度顺序分页时只算到当前页为止，总数按需计算或估算
+    需要排序时用堆选出前 page * size 条，不对全部结果排序；也可继续细化
+    """
+
+    def __init__(self, catalog, search, rows, fuzzy_rows=()):
+        self.catalog = catalog
+        self.search = search
+        self.query = Query(search)
+        self.rows = rows
+        self.fuzzy_rows = fuzzy_rows
+        self._ranked = []
+
+    @property
+    def version(self):
+        """所属目录的版本（各层文件签名），与 skills_version() / repos_version() 可比较"""
+        return repr(self.catalog.signature)
+
+    @property
+    def total(self):
+        """精确总数（需要算完全部候选行）"""
+        return len(self.rows) + len(self.fuzzy_rows)
+
+    @property
+    def total_known(self):
+        """精确总数是否已经算出，无需再检查候选行"""
+        return getattr(self.rows, 'done', True)
+
+    def estimated_total(self):
+        """总数的估算值，不额外检查候选行；total_known 为 True 时即精确值"""
+        rows = self.rows
+        count = rows.estimate() if isinstance(rows, _LazyRows) else len(rows)
+        return count + len(self.fuzzy_rows)
+
+    @property
+    def ranked(self):
+        """是否按得分排序：关键词太短（如单个字母）或只有字段限定时按热门度顺序"""
+        return len(self.query.term) >= RANK_MIN_LENGTH
+
+    def refines(self, search):
+        """
+        新关键词的结果是否一定是本结果的子集（同一目录版本且条件更严格），可在本结果中继续筛选
+        空关键词或很短的关键词几乎匹配整个目录，逐行筛选反而比用索引重新搜索慢，不作为细化的基础
+        """
+        query = self.query
+        if not query.filters and len(query.text) < RANK_MIN_LENGTH:
+            return False
+        return (self.catalog is _catalogs.get(self.catalog.file_path)
+                and Query(search).implies(query))
+
+    def iter_lines(self):
+        """按目录顺序逐条返回匹配的行，找到一条就返回一条；没有匹配时返回按得分排序的模糊匹配"""
+        lines = self.catalog.lines
+        for row in self.rows:
+            yield lines[row]
+        if self.fuzzy_rows:
+            scorer = self.catalog.scorer(self.query, self.fuzzy_rows)
+            for row in sorted(self.fuzzy_rows, key=scorer, reverse=True):
+                yield lines[row]
+
+    def page(self, page=1, size=50):
+        """返回指定页的行，需要排序时按得分排序，否则按热门度顺序且只计算到本页为止"""
+        start_index = (page - 1) * size
+        end_index = start_index + size
+        if not self.ranked:
+            rows = list(itertools.islice(itertools.chain(self.rows, self.fuzzy_rows), start_index, end_index))
+        else:
+            if len(self._ranked) < end_index and not (self.total_known and len(self._ranked) >= self.total):
+                self._ranked = heapq.nlargest(
+                    end_index, itertools.chain(self.rows, self.fuzzy_rows),
+                    key=self.catalog.scorer(self.query, self.fuzzy_rows))
+            rows = self._ranked[start_index:end_index]
+        return [self.catalog.lines[row] for row in rows]
+
+
+def get_catalog(file_path, layer_paths, signature, rank_paths=None):
+    """
+    获取目录的解析缓存，各层文件签名 signature 变化（包括增删自定义仓库）后重新解析
+    rank_paths 为技能目录热门度排序所依据的 repo.sort 各层文件
+    """
+    with _catalogs_lock:
+        catalog = _catalogs.get(file_path)
+        if catalog is None or catalog.signature != signature:
+            catalog = Catalog(file_path, layer_paths, signature, rank_paths)
+            _catalogs[file_path] = catalog
+    return catalog
+
+
+def search(catalog, search_text, within=None):
+    """
+    在目录中搜索，返回 SearchResult
+    within 为之前的搜索结果且新关键词是其细化时，只在其匹配行中继续筛选
+    """
+    query = Query(search_text)
+    if within is not None and within.refines(search_text):
+        if within.query == query:
+            return within
+        rows = catalog.find(query, within.rows)
+    else:
+        # 使用 Python 内置字符串搜索（跨平台兼容，不依赖 grep）
+        rows = catalog.find(query)
+
+    # 包含关键词的结果很少时（多半是拼写错误），补充模糊匹配结果；使用字段限定时不做纠错
+    fuzzy_rows = ()
+    if query.text and not query.filters and not rows.at_least(FUZZY_MAX_MATCHES):
+        fuzzy_rows = catalog.fuzzy_find(query, exclude=rows)
+    return SearchResult(catalog, search_text, rows, fuzzy_rows)
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+Git 仓库镜像缓存 - 每个仓库在 ~/.skill-hub/.cache/git/owner/repo 保留一个裸仓库，
+安装和更新时用 git fetch --depth 1 增量获取最新提交（只传输镜像中还没有的对象），
+再用 git archive 把该提交导出到目标目录；缓存总大小超过上限时按最近使用时间淘汰空闲的镜像
+
+镜像是部分克隆（--filter=blob:none）：获取时只下载提交和目录树，导出时才一次性下载所需路径下
+缺少的文件内容，安装单个技能时只传输该技能目录中的文件；服务器不支持时退回完整获取
+
+可通过环境变量 SKILL_HUB_GIT_CACHE_MB 配置缓存总大小上限（默认 500MB）
+"""
+
+import os
+import shutil
+import tarfile
+import threading
+import subprocess
+from pathlib import Path
+
+cache_dir = Path.home() / '.skill-hub' / '.cache' / 'git'
+
+# 获取和导出的超时时间（秒）
+FETCH_TIMEOUT = 60
+
+# 镜像总大小上限
+try:
+    MAX_CACHE_BYTES = int(float(os.environ.get('SKILL_HUB_GIT_CACHE_MB', 500)) * 1024 * 1024)
+except ValueError:
+    MAX_CACHE_BYTES = 500 * 1024 * 1024
+
+# 镜像中记录最近一次获取的提交的引用
+CACHED_REF = 'refs/skill-hub/head'
+
+# 镜像最近使用时间的标记文件（修改时间）
+_USED_MARKER = 'skill-hub-used'
+
+# 镜像大小的记录文件，获取或下载文件内容后更新，淘汰时不必遍历每个镜像的所有文件
+_SIZE_FILE = 'skill-hub-size'
+
+# 一次请求下载的文件对象数上限
+_PREFETCH_BATCH = 2000
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _repo_lock(repo):
+    """同一仓库的镜像同时只有一个线程在获取或导出"""
+    with _locks_guard:
+        return _locks.setdefault(repo, threading.Lock())
+
+
+def mirror_path(repo):
+    """仓库（owner/repo）的镜像目录"""
+    owner, repo_name = repo.split('/')
+    return cache_dir / owner / repo_name
+
+
+def _git(mirror, *args, timeout=FETCH_TIMEOUT):
+    """在镜像中执行 git 命令，失败时抛出 subprocess 异常，返回标准输出"""
+    result = subprocess.run(
+        ['git', '--git-dir', str(mirror), *args],
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        timeout=timeout
+    )
+    return result.stdout.decode('utf-8', errors='replace').strip()
+
+
+def _is_mirror(mirror):
+    """镜像目录是否为可用的裸仓库（下载中断等情况会留下不完整的目录）"""
+    if not (mirror / 'HEAD').exists():
+        return False
+    try:
+        _git(mirror, 'rev-parse', '--git-dir', timeout=10)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        return False
+    return True
+
+
+def _is_partial(mirror):
+    """镜像是否为部分克隆（文件内容按需下载）"""
+    try:
+        return _git(mirror, 'config', '--get', 'remote.origin.promisor', timeout=10) == 'true'
+    except subprocess.CalledProcessError:
+        return False
+
+
+def _create_mirror(repo, mirror):
+    if mirror.exists():
+        shutil.rmtree(mirror)
+    mirror.parent.mkdir(parents=True, exist_ok=True)
+    subprocess.run(
+        ['git', 'init', '--bare', '--quiet', str(mirror)],
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        timeout=FETCH_TIMEOUT
+    )
+    _git(mirror, 'remote', 'add', 'origin', f"https://github.com/{repo}")
+
+
+def fetch(repo, partial=True):
+    """
+    更新仓库镜像到远程默认分支的最新提交（不存在时新建），返回提交的 sha
+    镜像是浅仓库，获取时会告知服务器本地已有的提交，服务器只发送新的对象
+    :param partial: 新建镜像时是否只获取提交和目录树（已有的完整镜像保持完整获取）
+    """
+    mirror = mirror_path(repo)
+    with _repo_lock(repo):
+        if not _is_mirror(mirror):
+            _create_mirror(repo, mirror)
+        elif not _is_partial(mirror):
+            partial = False
+        command = ['fetch', '--depth', '1', '--quiet', '--no-tags']
+        if partial:
+            command.append('--filter=blob:none')
+        _git(mirror, *command, 'origin', 'HEAD')
+        commit = _git(mirror, 'rev-parse', 'FETCH_HEAD^{commit}')
+        # 用固定的引用保存最新提交，旧的提交不再被引用，由 git gc 回收
+        _git(mirror, 'update-ref', CACHED_REF, commit)
+        (mirror / _USED_MARKER).touch()
+        _record_size(mirror)
+    _evict(keep=mirror)
+    return commit
+
+
+def list_files(repo, commit):
+    """提交中所有文件的路径（只读取目录树，不下载文件内容）"""
+    output = _git(mirror_path(repo), 'ls-tree', '-r', '-z', '--name-only', commit)
+    return [path for path in output.split('\0') if path]
+
+
+def skill_path(repo, commit, skill_name):
+    """
+    技能目录在提交中的路径：根目录有 SKILL.md 且技能名与仓库名相同时为 ''（整个仓库），
+    否则为名称等于技能名且包含 SKILL.md 的最浅的目录，找不到时为 None
+    """
+    paths = list_files(repo, commit)
+    if 'SKILL.md' in paths and skill_name == repo.split('/')[1]:
+        return ''
+    candidates = [path[:-len('/SKILL.md')] for path in paths
+                  if path.endswith(f"/{skill_name}/SKILL.md") or path == f"{skill_name}/SKILL.md"]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda path: (path.count('/'), path))
+
+
+def _prefetch_blobs(mirror, commit, paths):
+    """
+    在部分克隆的镜像中一次性下载 paths 下缺少的文件内容，避免导出时逐个按需下载
+    返回是否下载了文件内容
+    """
+    listing = _git(mirror, 'ls-tree', '-r', '-z', commit, '--', *paths)
+    wanted = set()
+    for entry in listing.split('\0'):
+        if entry:
+            _, object_type, oid = entry.split('\t', 1)[0].split()
+            if object_type == 'blob':
+                wanted.add(oid)
+    # --missing=print 只列出缺少的对象，不会触发按需下载
+    missing = {line[1:] for line in _git(mirror, 'rev-list', '--objects', '--missing=print', commit).splitlines()
+               if line.startswith('?')}
+    needed = sorted(wanted & missing)
+    # 按对象 id 获取，每批一次请求（分批避免命令行过长）
+    for start in range(0, len(needed), _PREFETCH_BATCH):
+        _git(mirror, '-c', 'fetch.negotiationAlgorithm=noop', 'fetch', '--quiet', '--no-tags',
+             '--no-write-fetch-head', '--recurse-submodules=no', '--filter=blob:none',
+             'origin', *needed[start:start + _PREFETCH_BATCH])
+    return bool(needed)
+
+
+def _extract_archive(mirror, tree, dest, prefix=None):
+    """用 git archive 导出 tree 并解压到 dest，prefix 为导出条目的路径前缀"""
+    command = ['git', '--git-dir', str(mirror), 'archive', '--format=tar']
+    if prefix:
+        command.append(f"--prefix={prefix}/")
+    process = subprocess.Popen(command + [tree], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        with tarfile.open(fileobj=process.stdout, mode='r|') as archive:
+            if hasattr(tarfile, 'tar_filter'):
+                # 拒绝绝对路径和跳出目标目录的条目
+                archive.extractall(dest, filter='tar')
+            else:
+                archive.extractall(dest)
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        returncode = process.wait(timeout=FETCH_TIMEOUT)
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, process.args, stderr=stderr)
+
+
+def export(repo, commit, dest, paths=()):
+    """
+    用 git archive 把镜像中的提交导出到 dest 目录（不包含 .git），paths 不为空时只导出这些目录
+    部分克隆的镜像先一次性下载所需目录下缺少的文件内容
+    """
+    mirror = mirror_path(repo)
+    dest = Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    with _repo_lock(repo):
+        if _is_partial(mirror) and _prefetch_blobs(mirror, commit, paths):
+            _record_size(mirror)
+        if not paths:
+            _extract_archive(mirror, commit, dest)
+        # 按子目录的树对象分别导出：对整个提交加路径过滤导出时，git 会先下载整个提交缺少的文件内容
+        for path in paths:
+            _extract_archive(mirror, f"{commit}:{path}", dest, prefix=path)
+
+
+def checkout(repo, dest, skill_names=None):
+    """
+    获取仓库最新提交并导出到 dest，返回提交的 sha；代替 git clone --depth 1
+    指定 skill_names 时只导出这些技能的目录（保持其在仓库中的相对路径），仓库中没有的技能不导出
+    部分克隆的镜像导出失败（服务器不支持按对象下载等）时，重建为完整镜像后再试一次
+    """
+    commit = fetch(repo)
+    try:
+        _export_skills(repo, commit, dest, skill_names)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        mirror = mirror_path(repo)
+        if not _is_partial(mirror):
+            raise
+        with _repo_lock(repo):
+            shutil.rmtree(mirror, ignore_errors=True)
+        shutil.rmtree(dest, ignore_errors=True)
+        commit = fetch(repo, partial=False)
+        _export_skills(repo, commit, dest, skill_names)
+    return commit
+
+
+def _export_skills(repo, commit, dest, skill_names):
+    if skill_names is None:
+        export(repo, commit, dest)
+        return
+    paths = [skill_path(repo, commit, skill_name) for skill_name in skill_names]
+    paths = [path for path in paths if path is not None]
+    if '' in paths:
+        # 整个仓库就是一个技能
+        export(repo, commit, dest)
+    elif paths:
+        export(repo, commit, dest, paths)
+    else:
+        Path(dest).mkdir(parents=True, exist_ok=True)
+
+
+def _dir_size(path):
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _record_size(mirror):
+    """计算镜像大小并写入记录文件，返回大小"""
+    size = _dir_size(mirror)
+    try:
+        (mirror / _SIZE_FILE).write_text(str(size))
+    except OSError:
+        pass
+    return size
+
+
+def _mirror_size(mirror):
+    """镜像记录的大小，没有记录（旧版本创建的镜像）时计算一次并记录"""
+    try:
+        return int((mirror / _SIZE_FILE).read_text())
+    except (OSError, ValueError):
+        return _record_size(mirror)
+
+
+def _last_used(mirror):
+    try:
+        return (mirror / _USED_MARKER).stat().st_mtime
+    except OSError:
+        return 0
+
+
+def _evict(keep=None):
+    """镜像总大小超过上限时，按最近使用时间从旧到新删除空闲的镜像（keep 和正在使用的镜像除外）"""
+    if not cache_dir.exists():
+        return
+    mirrors = [repo_dir for owner_dir in cache_dir.iterdir() if owner_dir.is_dir()
+               for repo_dir in owner_dir.iterdir() if repo_dir.is_dir()]
+    sizes = {mirror: _mirror_size(mirror) for mirror in mirrors}
+    total = sum(sizes.values())
+    for mirror in sorted(mirrors, key=_last_used):
+        if total <= MAX_CACHE_BYTES:
+            break
+        if mirror == keep:
+            continue
+        lock = _repo_lock(f"{mirror.parent.name}/{mirror.name}")
+        if not lock.acquire(blocking=False):
+            continue
+        try:
+            shutil.rmtree(mirror, ignore_errors=True)
+        finally:
+            lock.release()
+        total -= sizes[mirror]
+        try:
+            mirror.parent.rmdir()
+        except OSError:
+            pass
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP 访问层 - 所有网络请求共用一个 requests.Session，复用连接（keep-alive），
+统一设置连接/读取超时、有限次数的重试退避和代理，并记录每次请求的耗时
+
+可通过环境变量配置:
+    SKILL_HUB_CONNECT_TIMEOUT  连接超时秒数（默认 5）
+    SKILL_HUB_READ_TIMEOUT     读取超时秒数（默认 30）
+    SKILL_HUB_HTTP_RETRIES     连接失败、超时或 429/5xx 时的重试次数（默认 3）
+    SKILL_HUB_PROXY            代理地址，同时用于 http 和 https；未设置时沿用 HTTP(S)_PROXY 环境变量
+    SKILL_HUB_HTTP_LOG         请求耗时日志文件路径，设置后每次请求追加一行
+"""
+
+import os
+import time
+import threading
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def _env_number(name, default, cast=float):
+    try:
+        return cast(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+CONNECT_TIMEOUT = _env_number('SKILL_HUB_CONNECT_TIMEOUT', 5)
+READ_TIMEOUT = _env_number('SKILL_HUB_READ_TIMEOUT', 30)
+RETRIES = _env_number('SKILL_HUB_HTTP_RETRIES', 3, int)
+# 重试间隔按 0.5s、1s、2s ... 递增
+BACKOFF_FACTOR = 0.5
+# 单次请求超过该秒数视为慢请求
+SLOW_REQUEST_SECONDS = 3
+
+# 最近的请求耗时记录: (开始时间, 方法, 地址, 状态码, 耗时秒数)，请求失败时状态码为 None
+timings = deque(maxlen=200)
+
+_session = None
+_session_lock = threading.Lock()
+_log_lock = threading.Lock()
+
+
+def _retry():
+    """只重试幂等的 GET/HEAD 请求；返回最后一次响应而不是抛出异常，由调用方检查状态码"""
+    options = dict(
+        total=RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=(429, 500, 502, 503, 504),
+        raise_on_status=False,
+    )
+    try:
+        return Retry(allowed_methods=frozenset(['GET', 'HEAD']), **options)
+    except TypeError:
+        # urllib3 1.26 之前的参数名
+        return Retry(method_whitelist=frozenset(['GET', 'HEAD']), **options)
+
+
+def get_session():
+    """获取共享的 Session，首次调用时创建"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(max_retries=_retry(), pool_connections=8, pool_maxsize=16)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+def _record(started, method, url, status, elapsed):
+    timings.append((started, method, url, status, elapsed))
+    log_path = os.environ.get('SKILL_HUB_HTTP_LOG')
+    if not log_path:
+        return
+    slow = ' SLOW' if elapsed >= SLOW_REQUEST_SECONDS else ''
+    line = (f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started))} "
+            f"{method} {url} {status or 'ERROR'} {elapsed * 1000:.0f}ms{slow}\n")
+    try:
+        with _log_lock, open(log_path, 'a', encoding='utf-8') as f:
+            f.write(line)
+    except OSError:
+        pass
+
+
+def request(method, url, **kwargs):
+    """
+    通过共享 Session 发送请求，默认使用 (连接超时, 读取超时)，参数与 requests.request 相同
+    记录的耗时为收到响应头的时间，stream=True 时不包含读取响应内容的时间
+    """
+    kwargs.setdefault('timeout', (CONNECT_TIMEOUT, READ_TIMEOUT))
+    proxy = os.environ.get('SKILL_HUB_PROXY')
+    if proxy:
+        # 按请求传入：requests 会用 HTTP(S)_PROXY 环境变量覆盖 Session.proxies，但不会覆盖请求参数
+        kwargs.setdefault('proxies', {'http': proxy, 'https': proxy})
+    started = time.time()
+    status = None
+    try:
+        response = get_session().request(method, url, **kwargs)
+        status = response.status_code
+        return response
+    finally:
+        _record(started, method, url, status, time.time() - started)
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def slow_requests(threshold=SLOW_REQUEST_SECONDS):
+    """最近耗时超过 threshold 秒或失败的请求"""
+    return [timing for timing in timings if timing[3] is None or timing[4] >= threshold]
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+安装清单 - 在 ~/.skill-hub/manifest.json 中记录每个已安装仓库和技能来源的提交 sha，
+更新前用 git ls-remote 查询远程最新提交，一致时跳过下载
+
+清单格式:
+    {"owner/repo": {"commit": "<安装整个仓库时的提交>", "skills": {"<技能名>": "<安装该技能时的提交>"}}}
+"""
+
+import os
+import json
+import shutil
+import threading
+import subprocess
+from pathlib import Path
+
+manifest_path = Path.home() / '.skill-hub' / 'manifest.json'
+
+# 查询远程提交的超时时间（秒）
+LS_REMOTE_TIMEOUT = 30
+
+_lock = threading.Lock()
+
+
+def _load():
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save(data):
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_name(f"{manifest_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def recorded(repo, skill_name=None):
+    """
+    记录的来源提交：skill_name 为 None 时为整个仓库的提交，
+    否则为该技能的提交（没有单独记录时沿用整个仓库的提交），没有记录时返回 None
+    """
+    entry = _load().get(repo) or {}
+    if skill_name is not None:
+        return (entry.get('skills') or {}).get(skill_name) or entry.get('commit')
+    return entry.get('commit')
+
+
+def record(repo, commit, skill_name=None):
+    """记录安装或更新后的来源提交；commit 为空（无法得知）时清除旧记录，避免误判为最新"""
+    with _lock:
+        data = _load()
+        entry = data.setdefault(repo, {})
+        skills = entry.setdefault('skills', {})
+        if skill_name is None:
+            # 整个仓库重新安装后，各技能都来自同一个提交
+            skills.clear()
+            if commit:
+                entry['commit'] = commit
+            else:
+                entry.pop('commit', None)
+        elif commit:
+            skills[skill_name] = commit
+        else:
+            skills.pop(skill_name, None)
+        _save(data)
+
+
+def forget(repo, skill_name=None):
+    """卸载后删除记录"""
+    with _lock:
+        data = _load()
+        if repo not in data:
+            return
+        if skill_name is None:
+            del data[repo]
+        else:
+            (data[repo].get('skills') or {}).pop(skill_name, None)
+        _save(data)
+
+
+def remote_head(repo):
+    """
+    用 git ls-remote 查询远程默认分支的最新提交（只需一次请求，不下载任何对象）
+    没有 git 或查询失败时返回 None
+    """
+    if shutil.which('git') is None:
+        return None
+    try:
+        result = subprocess.run(
+            ['git', 'ls-remote', f"https://github.com/{repo}", 'HEAD'],
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=LS_REMOTE_TIMEOUT
+        )
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        return None
+    fields = result.stdout.decode('utf-8', errors='replace').split()
+    return fields[0] if fields else None
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+SKILL.md 预览缓存 - 把线上下载的 SKILL.md 保存在 ~/.skill-hub/cache/md，
+过期后用 ETag / Last-Modified 条件请求校验，总大小超过上限时按最近使用时间淘汰；
+后台预取线程提前下载光标附近技能的预览，打开预览时直接读取本地缓存
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+from skill_hub.utils import http_client
+
+cache_dir = Path.home() / '.skill-hub' / 'cache' / 'md'
+
+# 缓存内容超过该时间后在后台重新校验（秒）
+MAX_AGE = 24 * 60 * 60
+
+# 缓存总大小上限，可通过环境变量 SKILL_HUB_MD_CACHE_MB 配置
+try:
+    MAX_CACHE_BYTES = int(float(os.environ.get('SKILL_HUB_MD_CACHE_MB', 20)) * 1024 * 1024)
+except ValueError:
+    MAX_CACHE_BYTES = 20 * 1024 * 1024
+
+_write_lock = threading.Lock()
+
+
+def _paths(url):
+    """缓存内容文件和校验信息文件"""
+    key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return cache_dir / f"{key}.md", cache_dir / f"{key}.json"
+
+
+def _read(url):
+    """读取缓存，返回 (内容, 校验信息)，没有缓存时返回 (None, {})"""
+    body_path, meta_path = _paths(url)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        content = body_path.read_text(encoding='utf-8')
+    except (OSError, ValueError):
+        return None, {}
+    if meta.get('url') != url:
+        return None, {}
+    return content, meta
+
+
+def _touch(url):
+    """更新最近使用时间（内容文件的修改时间），淘汰时保留最近使用的缓存"""
+    try:
+        os.utime(_paths(url)[0])
+    except OSError:
+        pass
+
+
+def _store(url, content, response):
+    body_path, meta_path = _paths(url)
+    meta = {
+        'url': url,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'fetched': time.time(),
+    }
+    with _write_lock:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = body_path.with_name(f"{body_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(content, encoding='utf-8')
+        os.replace(tmp_path, body_path)
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        _evict()
+
+
+def _evict():
+    """缓存总大小超过上限时，按最近使用时间从旧到新删除"""
+    entries = []
+    total = 0
+    for body_path in cache_dir.glob('*.md'):
+        try:
+            stat = body_path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, body_path))
+        total += stat.st_size
+    entries.sort()
+    for _, size, body_path in entries:
+        if total <= MAX_CACHE_BYTES:
+            break
+        for path in (body_path, body_path.with_suffix('.json')):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        total -= size
+
+
+def fetch(url):
+    """
+    下载（或用条件请求校验）SKILL.md 并写入缓存，返回内容
+    服务器返回 304 时沿用缓存内容；请求失败时抛出异常
+    """
+    cached, meta = _read(url)
+    headers = {}
+    if cached is not None:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    response = http_client.get(url, headers=headers, timeout=(http_client.CONNECT_TIMEOUT, 10))
+    if response.status_code == 304 and cached is not None:
+        meta['fetched'] = time.time()
+        with _write_lock, open(_paths(url)[1], 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        _touch(url)
+        return cached
+    response.raise_for_status()
+    content = response.text
+    _store(url, content, response)
+    return content
+
+
+def get(url):
+    """
+    获取 SKILL.md 内容：有缓存时立即返回（过期的缓存交给后台重新校验），没有缓存时同步下载
+    """
+    cached, meta = _read(url)
+    if cached is None:
+        return fetch(url)
+    _touch(url)
+    if time.time() - meta.get('fetched', 0) > MAX_AGE:
+        _prefetcher.revalidate(url)
+    return cached
+
+
+def is_fresh(url):
+    """是否已有未过期的缓存"""
+    _, meta = _read(url)
+    return bool(meta) and time.time() - meta.get('fetched', 0) <= MAX_AGE
+
+
+class _Prefetcher:
+    """
+    后台预取线程：只保留最近一次请求的预取列表（光标移动后旧的列表作废），逐个下载尚未缓存的预览
+    线程为守护线程，退出程序时不等待预取完成
+    """
+
+    def __init__(self):
+        self._pending = []
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='md-prefetch', daemon=True)
+            self._thread.start()
+
+    def prefetch(self, urls):
+        """用新的地址列表替换待预取列表，已有未过期缓存的地址跳过"""
+        with self._condition:
+            self._pending = [url for url in dict.fromkeys(urls) if url]
+            self._ensure_thread()
+            self._condition.notify()
+
+    def revalidate(self, url):
+        """把过期的缓存放到待预取列表最前面重新校验"""
+        with self._condition:
+            if url not in self._pending:
+                self._pending.insert(0, url)
+            self._ensure_thread()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                url = self._pending.pop(0)
+            if is_fresh(url):
+                continue
+            try:
+                fetch(url)
+            except Exception:
+                # 预取失败不影响使用，打开预览时会再次尝试
+                pass
+
+
+_prefetcher = _Prefetcher()
+
+
+def prefetch(urls):
+    """在后台预取一组 SKILL.md 预览"""
+    _prefetcher.prefetch(urls)
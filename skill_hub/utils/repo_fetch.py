@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+仓库获取 - 安装和更新时选择获取引擎:
+    git      本地镜像缓存 + git fetch 增量获取（默认，见 git_cache.py）
+    tarball  通过 HTTP 下载仓库压缩包（见 tarball_fetch.py），不需要 git 命令
+可通过环境变量 SKILL_HUB_FETCH_ENGINE 选择；没有安装 git 时自动使用 tarball
+"""
+
+import os
+import shutil
+
+FETCH_ENGINE = os.environ.get('SKILL_HUB_FETCH_ENGINE', 'git').strip().lower()
+
+
+def engine():
+    """当前使用的获取引擎"""
+    if FETCH_ENGINE == 'tarball' or shutil.which('git') is None:
+        return 'tarball'
+    return 'git'
+
+
+def checkout(repo, dest, skill_names=None):
+    """
+    获取仓库最新内容并导出到 dest，返回提交的 sha（无法得知时为 None）
+    指定 skill_names 时只导出这些技能的目录
+    """
+    if engine() == 'tarball':
+        from skill_hub.utils import tarball_fetch
+        return tarball_fetch.checkout(repo, dest, skill_names)
+    from skill_hub.utils import git_cache
+    return git_cache.checkout(repo, dest, skill_names)
@@ -3,10 +3,18 @@ skills_url = 'https://skill-hub.oss-cn-shanghai.aliyuncs.com/skill.list'
 repos_url = 'https://skill-hub.oss-cn-shanghai.aliyuncs.com/repo.sort'
 
 import os
+import re
 import sys
+import json
+import codecs
+import shutil
+import threading
 import requests
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from skill_hub.utils import http_client, catalog_search
 import time
+import zlib
 
 # Reconfigure stdout to handle UTF-8 on Windows
 if sys.platform == 'win32':
@@ -14,6 +22,43 @@ if sys.platform == 'win32':
 
 skill_hub_dir = Path.home() / '.skill-hub'
 
+# 目录文件的刷新周期（小时），可通过环境变量 SKILL_HUB_REFRESH_HOURS 配置
+try:
+    refresh_hours = float(os.environ.get('SKILL_HUB_REFRESH_HOURS', 24))
+except ValueError:
+    refresh_hours = 24
+
+# 目录搜索后端: file（默认，内存解析 + 倒排索引）或 sqlite（SQLite FTS5，适合超大目录），
+# 可通过环境变量 SKILL_HUB_CATALOG_BACKEND 配置
+catalog_backend = os.environ.get('SKILL_HUB_CATALOG_BACKEND', 'file').lower()
+
+# 目录下载地址，可通过环境变量 SKILL_HUB_CATALOG_URL 指向镜像或本地测试服务器
+catalog_url = os.environ.get('SKILL_HUB_CATALOG_URL', '').rstrip('/')
+if catalog_url:
+    skills_url = f'{catalog_url}/skill.list'
+    repos_url = f'{catalog_url}/repo.sort'
+
+# 目录来源配置: 按优先级从高到低排列，同一技能/仓库以靠前的来源为准，例如
+#   [{"name": "internal", "url": "https://mirror.example.com/skill-hub"},
+#    {"name": "hub"},
+#    {"name": "team", "path": "/shared/skill-hub"}]
+# url 来源从该地址下载 skill.list / repo.sort；path 来源直接读取本地目录中的同名文件；
+# hub 为公共目录（skills_url / repos_url）。没有配置文件时只使用公共目录
+sources_path = skill_hub_dir / 'sources.json'
+_source_name = re.compile(r'^[\w-]+$')
+# 已读取的来源配置: (配置文件签名, 来源列表)
+_sources_cache = None
+
+# 本地版本落后超过该数量时不再逐个应用差异文件，直接完整下载
+DELTA_MAX_CHAIN = 50
+
+# 命令行搜索输出结果后，最多等待后台刷新完成的时间（秒）
+REFRESH_WAIT_SECONDS = 30
+
+# 正在后台刷新的目录文件: 文件路径 -> 线程
+_refresh_threads = {}
+_refresh_lock = threading.Lock()
+
 def add_custom_repo(repo_name):
     """添加自定义仓库"""
 
@@ -50,10 +95,9 @@ def add_custom_repo(repo_name):
     with open(repo_file_path, 'w', encoding='utf-8') as f:
         f.write('\n'.join(repos))
 
+    # 自定义仓库在搜索时与远程仓库列表合并，无需重新下载
     print(f"{repo_name} 添加成功")
 
-    update_skill_files(skill_hub_dir / 'repo.sort')
-
 
 def rm_custom_repo(repo_name):
     """删除自定义仓库"""
@@ -94,80 +138,531 @@ def rm_custom_repo(repo_name):
         f.write('\n'.join(repos))
     print(f"{repo_name} 删除成功")
 
-    update_skill_files(skill_hub_dir / 'repo.sort')
+def _meta_path(file_path):
+    """目录文件对应的下载元数据文件，例如 skill.list -> skill.list.meta"""
+    return file_path.with_name(file_path.name + '.meta')
 
-def update_skill_files(file_path):
-    """下载技能列表和仓库排序文件到 ~/.skill-hub 目录"""
-    skill_hub_dir.mkdir(exist_ok=True)
-    
+
+def _load_meta(file_path):
+    """读取上次下载时服务器返回的校验信息 (ETag / Last-Modified / 长度)"""
+    try:
+        with open(_meta_path(file_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _save_meta(file_path, meta, quiet=False):
+    meta_path = _meta_path(file_path)
+    tmp_path = meta_path.with_name(f"{meta_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+    except Exception as e:
+        if not quiet:
+            print(f"保存 {file_path.name} 下载信息时出错: {e}")
+
+
+def _custom_path(file_path):
+    """目录文件对应的本地自定义列表，例如 repo.sort -> repo_custom.list"""
+    return file_path.with_name(f"{file_path.name.split('.')[0]}_custom.list")
+
+
+def _backup_path(file_path):
+    """上一个可用版本的目录文件，例如 skill.list -> skill.list.bak"""
+    return file_path.with_name(file_path.name + '.bak')
+
+
+def _stream_catalog(response, f, chunk_size=64 * 1024, compressed=False):
+    """
+    把响应内容分块写入文件，同时校验内容确实是目录文本
+    compressed 为 True 时响应是 gzip 压缩的目录文件，边接收边解压后写入
+    返回 HTML 错误页、非 UTF-8 内容、空内容、压缩内容不完整或长度不符时抛出 ValueError
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if compressed else None
+    received = 0
+    size = 0
+
+    def write(data):
+        nonlocal size
+        if not data:
+            return
+        if size == 0 and data.lstrip()[:1] == b'<':
+            raise ValueError("返回内容不是目录文件（疑似 HTML 错误页）")
+        decoder.decode(data)
+        f.write(data)
+        size += len(data)
+
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            received += len(chunk)
+            write(decompressor.decompress(chunk) if decompressor is not None else chunk)
+        if decompressor is not None:
+            write(decompressor.flush())
+    except zlib.error as e:
+        raise ValueError(f"压缩内容无法解压: {e}")
+    decoder.decode(b'', final=True)
+
+    if decompressor is not None and not decompressor.eof:
+        raise ValueError("压缩内容不完整")
+    if size == 0:
+        raise ValueError("返回内容为空")
+    # 未经传输编码时，实际接收的长度必须与 Content-Length 一致
+    expected = response.headers.get('Content-Length')
+    if expected and not response.headers.get('Content-Encoding') and int(expected) != received:
+        raise ValueError(f"内容不完整: 期望 {expected} 字节，实际 {received} 字节")
+
+
+def _replace_catalog(tmp_path, file_path):
+    """用新文件原子替换目录文件，替换前把当前版本保留为 .bak"""
+    if file_path.exists():
+        backup_path = _backup_path(file_path)
+        backup_tmp = backup_path.with_name(f"{backup_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            os.link(file_path, backup_tmp)
+        except OSError:
+            shutil.copy2(file_path, backup_tmp)
+        os.replace(backup_tmp, backup_path)
+    os.replace(tmp_path, file_path)
+
+
+def _restore_backup(file_path):
+    """目录文件缺失时，用上一个可用版本恢复，返回是否恢复成功"""
+    backup_path = _backup_path(file_path)
+    if file_path.exists() or not backup_path.exists():
+        return False
+    try:
+        shutil.copy2(backup_path, file_path)
+        return True
+    except OSError:
+        return False
+
+
+def _fetch_version(url):
+    """获取远程目录的 (版本号, sha256)，服务器没有发布版本信息时返回 None"""
+    from skill_hub.utils import catalog_delta
+
+    try:
+        response = http_client.get(url + '.version')
+        if response.status_code != 200:
+            return None
+        return catalog_delta.parse_version(response.text)
+    except (requests.RequestException, ValueError):
+        return None
+
+
+def _update_by_delta(file_path, url, meta, remote):
+    """
+    下载本地版本之后的差异文件并依次应用，把目录更新到远程版本
+    本地没有版本记录、落后太多、差异缺失或结果校验不通过时返回 False，由调用方完整下载
+    """
+    from skill_hub.utils import catalog_delta
+
+    version, expected = remote
+    local = meta.get('version')
+    if not isinstance(local, int) or not 0 < version - local <= DELTA_MAX_CHAIN:
+        return False
+
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    if catalog_delta.checksum(data) != meta.get('sha256'):
+        # 本地文件与记录的版本不一致
+        return False
+
+    try:
+        lines = catalog_delta.split_lines(data)
+        for number in range(local + 1, version + 1):
+            response = http_client.get(f"{url}.delta/{number}")
+            if response.status_code != 200:
+                return False
+            lines = catalog_delta.apply_delta(lines, response.content.decode('utf-8'))
+        data = catalog_delta.join_lines(lines)
+    except (requests.RequestException, UnicodeDecodeError, catalog_delta.DeltaError):
+        return False
+    if catalog_delta.checksum(data) != expected:
+        return False
+
+    tmp_path = file_path.with_name(f"{file_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        _replace_catalog(tmp_path, file_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return True
+
+
+def _download_catalog(file_path, url, meta, conditional, remote, quiet=False):
+    """
+    完整下载目录文件：优先下载旁边的 gzip 压缩版本 ({url}.gz) 并边下载边解压，不可用时下载原文件
+    conditional 为 True 时用 ETag / Last-Modified 发送条件请求
+    服务器返回 304 时只记录检查时间并返回 False；下载内容与 remote 版本一致时记录版本号
+    """
+    from skill_hub.utils import catalog_delta
+
+    artifacts = ((url + '.gz', True), (url, False))
+    for artifact, compressed in artifacts:
+        headers = {}
+        if conditional and meta.get('artifact', url) == artifact:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        try:
+            response = http_client.get(artifact, headers=headers, stream=True)
+            if response.status_code == 304:
+                # 服务器内容未变化，只刷新检查时间；不修改目录文件本身，解析缓存和索引继续有效
+                meta['checked'] = time.time()
+                _save_meta(file_path, meta, quiet)
+                return False
+            response.raise_for_status()
+
+            # 服务器以 Content-Encoding: gzip 返回时 requests 已经解压
+            if 'gzip' in response.headers.get('Content-Encoding', ''):
+                compressed = False
+
+            # 分块写入 ~/.skill-hub 下的临时文件，校验通过后再替换正式文件
+            tmp_path = file_path.with_name(f"{file_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                with open(tmp_path, 'wb') as f:
+                    _stream_catalog(response, f, compressed=compressed)
+                _replace_catalog(tmp_path, file_path)
+            finally:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+            break
+        except (requests.RequestException, ValueError):
+            # 压缩版本不存在或不可用时改为下载原文件
+            if artifact == url:
+                raise
+
+    meta = {
+        'url': url,
+        'artifact': artifact,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'length': response.headers.get('Content-Length'),
+        'checked': time.time(),
+    }
+    if remote is not None:
+        # 服务器发布了版本信息：确认下载的正是该版本，之后即可增量更新
+        with open(file_path, 'rb') as f:
+            if catalog_delta.checksum(f.read()) == remote[1]:
+                meta['version'], meta['sha256'] = remote
+    _save_meta(file_path, meta, quiet)
+    return True
+
+
+def load_sources():
+    """
+    读取目录来源配置，返回按优先级排列的来源列表；配置缺失或无效时只使用公共目录
+    配置文件未修改时直接返回上次读取的结果
+    """
+    global _sources_cache
+    default = [{'name': 'hub'}]
+    try:
+        signature = catalog_search.file_signature(sources_path)
+    except OSError:
+        return default
+    if _sources_cache is not None and _sources_cache[0] == signature:
+        return _sources_cache[1]
+
+    try:
+        with open(sources_path, 'r', encoding='utf-8') as f:
+            sources = json.load(f)
+    except Exception as e:
+        print(f"读取目录来源配置 {sources_path} 时出错: {e}")
+        sources = []
+
+    valid = []
+    for source in sources if isinstance(sources, list) else []:
+        name = source.get('name', '') if isinstance(source, dict) else ''
+        if not _source_name.match(name) or (name != 'hub' and not (source.get('url') or source.get('path'))):
+            print(f"忽略无效的目录来源: {source}")
+            continue
+        valid.append(source)
+    _sources_cache = (signature, valid or default)
+    return _sources_cache[1]
+
+
+def _source_files(file_path):
+    """
+    目录 (skill.list / repo.sort) 在各来源中的文件，按优先级排列: [(本地文件, 下载地址)]
+    公共目录保存为 ~/.skill-hub/skill.list，其他 url 来源保存为 skill-<name>.list，
+    path 来源直接使用其目录中的文件，下载地址为 None
+    """
     files_to_download = {
         'skill.list': skills_url,
         'repo.sort': repos_url
     }
+    stem, _, suffix = file_path.name.partition('.')
+    files = []
+    for source in load_sources():
+        name = source['name']
+        if source.get('path'):
+            files.append((Path(source['path']).expanduser() / file_path.name, None))
+        elif name == 'hub' and not source.get('url'):
+            files.append((file_path, files_to_download.get(file_path.name, '')))
+        else:
+            local = file_path if name == 'hub' else file_path.with_name(f"{stem}-{name}.{suffix}")
+            files.append((local, f"{source['url'].rstrip('/')}/{file_path.name}"))
+    return files
+
+
+def _catalog_path(file_path):
+    """来源文件所属的目录，例如 skill-internal.list -> skill.list"""
+    stem = file_path.name.split('.')[0].split('-')[0]
+    return file_path.with_name('repo.sort' if stem == 'repo' else 'skill.list')
+
+
+def update_skill_files(file_path, force=False, quiet=False, url=None, rebuild=True):
+    """
+    下载技能列表和仓库排序文件到 ~/.skill-hub 目录
+    文件只保存远程内容，本地自定义列表在搜索时合并
+    服务器发布了版本信息（见 catalog_delta）时只下载本地版本之后的差异文件，差异不可用时退回完整下载
+    完整下载优先使用 gzip 压缩版本，并使用 ETag / Last-Modified 发送条件请求，服务器返回 304 时只记录检查时间
+    新内容分块写入临时文件并校验，通过后整体替换，旧版本保留为 .bak；下载失败时当前文件不受影响
+    :param force: 忽略已保存的校验信息，强制完整下载
+    :param quiet: 不输出信息（后台刷新时使用）
+    :param url: 下载地址，默认为公共目录地址（其他来源的文件由 _source_files 给出地址）
+    :param rebuild: 下载后是否重新同步数据库或编译合并后的目录（同时下载多个来源时由调用方最后统一处理一次）
+    :return: 文件内容是否有更新
+    """
+    log = (lambda *args: None) if quiet else print
+    skill_hub_dir.mkdir(exist_ok=True)
 
     filename = file_path.name
-    url = files_to_download.get(filename, '')
+    if url is None:
+        url = dict(_source_files(file_path)).get(file_path) or ''
 
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-
-        custom_file = f"{filename.split('.')[0]}_custom.list"  
-        skill_custom_path = skill_hub_dir / custom_file
-        custom_skills = []
-        if skill_custom_path.exists():
-            with open(skill_custom_path, 'r', encoding='utf-8') as f:
-                custom_skills = [line.strip() for line in f.readlines() if line.strip()]
-
-        if custom_skills:
-            skills = custom_skills + response.text.split('\n')
-            with open(file_path, 'w') as f:
-                f.write('\n'.join(skills))
+        meta = _load_meta(file_path)
+        known = not force and file_path.exists() and meta.get('url') == url
+        remote = _fetch_version(url)
+        if known and remote is not None and remote == (meta.get('version'), meta.get('sha256')):
+            # 版本号未变化，只刷新检查时间
+            meta['checked'] = time.time()
+            _save_meta(file_path, meta, quiet)
+            log(f"{filename} 已是最新")
+            return False
+
+        if known and remote is not None and _update_by_delta(file_path, url, meta, remote):
+            _save_meta(file_path, {
+                'url': url,
+                'version': remote[0],
+                'sha256': remote[1],
+                'checked': time.time(),
+            }, quiet)
+            log(f"成功增量更新 {filename} 到版本 {remote[0]}")
         else:
-            with open(file_path, 'w') as f:
-                f.write(response.text)
-
-        print(f"成功下载 {filename} 到 {file_path}")
+            if not _download_catalog(file_path, url, meta, known, remote, quiet):
+                log(f"{filename} 已是最新")
+                return False
+            log(f"成功下载 {filename} 到 {file_path}")
     except Exception as e:
-        print(f"下载 {filename} 时出错: {e}")
-
-def _search(skill_file_path, search="", page=1, size=50):
-    """搜索技能文件中的技能，返回 (结果列表, 总数)"""
-    if not skill_file_path.exists():
-        # 如果文件不存在，下载文件
-        update_skill_files(skill_file_path)
+        log(f"下载 {filename} 时出错: {e}")
+        return False
+
+    if not _use_db():
+        catalog_search.build_index(file_path, quiet=quiet)
+    if rebuild:
+        _rebuild_catalog(_catalog_path(file_path), quiet)
+    return True
+
+
+def _rebuild_catalog(file_path, quiet=False):
+    """来源文件更新后，把合并后的目录同步到数据库或重新编译"""
+    if _use_db():
+        try:
+            _sync_db(file_path)
+        except Exception as e:
+            if not quiet:
+                print(f"同步 {file_path.name} 到数据库时出错: {e}")
     else:
-        # 检查文件修改时间，如果超过24小时则重新下载
-        file_modified_time = skill_file_path.stat().st_mtime
-        current_time = time.time()
-        if current_time - file_modified_time > 24 * 60 * 60:  # 24小时 = 24 * 60 * 60 秒
-            update_skill_files(skill_file_path)
-    try:
-        # 读取所有行
-        with open(skill_file_path, 'r', encoding='utf-8') as f:
-            all_lines = [line.strip() for line in f.readlines() if line.strip()]
+        compile_catalog(file_path, quiet=quiet)
 
-        # 过滤空行
-        all_lines = [line for line in all_lines if line.strip()]
 
-        if search:
-            # 使用 Python 内置字符串搜索（跨平台兼容，不依赖 grep）
-            search_lower = search.lower()
-            all_matching_lines = [line for line in all_lines if search_lower in line.lower()]
-        else:
-            all_matching_lines = all_lines
+def _required_catalogs(file_path):
+    """搜索目录时需要的目录文件：技能的热门度排序来自 repo.sort，搜索技能时两者都需要（被依赖的在前）"""
+    if file_path.name == 'skill.list':
+        return [file_path.with_name('repo.sort'), file_path]
+    return [file_path]
+
+
+def fetch_sources(file_path, quiet=False):
+    """
+    用线程池同时下载目录（以及它依赖的 repo.sort）在各来源中缺失的文件，下载失败时使用上一个可用版本
+    全部下载完成后，每个目录只重新编译（或同步）一次合并后的内容，避免技能目录先按没有排序的版本编译
+    """
+    catalogs = _required_catalogs(file_path)
+    missing = [(catalog, path, url) for catalog in catalogs
+               for path, url in _source_files(catalog) if url and not path.exists()]
+    if not missing:
+        return
+    with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+        updated = list(pool.map(
+            lambda item: update_skill_files(item[1], quiet=quiet, url=item[2], rebuild=False), missing))
+    for _, path, _ in missing:
+        _restore_backup(path)
+
+    changed = [catalog for (catalog, _, _), done in zip(missing, updated) if done]
+    for i, catalog in enumerate(catalogs):
+        # 被依赖的目录更新后，依赖它的目录也要重新编译
+        if any(other in changed for other in catalogs[:i + 1]):
+            _rebuild_catalog(catalog, quiet)
+
+
+def refresh_in_background(file_path, url=None):
+    """
+    在后台线程中刷新目录文件，同一进程中每个文件只刷新一次（失败时不会在每次按键时重试）
+    线程是守护线程，交互界面退出时不等待刷新完成；输出结果后即退出的命令行调用 wait_for_refresh 等待刷新完成
+    目录文件和各附属文件都先写临时文件再原子替换，中途退出只会留下 .tmp 文件，下次启动时重新刷新
+    """
+    with _refresh_lock:
+        thread = _refresh_threads.get(file_path)
+        if thread is not None:
+            return thread
+        thread = threading.Thread(
+            target=update_skill_files,
+            args=(file_path,),
+            kwargs={'quiet': True, 'url': url},
+            name=f"refresh-{file_path.name}",
+            daemon=True,
+        )
+        _refresh_threads[file_path] = thread
+        thread.start()
+        return thread
+
+
+def wait_for_refresh(timeout=REFRESH_WAIT_SECONDS):
+    """等待本进程启动的后台刷新完成，最多等待 timeout 秒（超时后退出时刷新被中断，下次再刷新）"""
+    deadline = time.time() + timeout
+    with _refresh_lock:
+        threads = list(_refresh_threads.values())
+    for thread in threads:
+        thread.join(max(0, deadline - time.time()))
+
+
+def _catalog_layers(file_path):
+    """
+    目录的各层文件及其签名：本地自定义列表在前，各来源的目录文件按优先级在后
+    （离线且未下载过时只有自定义列表）
+    """
+    candidates = [_custom_path(file_path)] + [path for path, _ in _source_files(file_path)]
+    layer_paths = [path for path in candidates if path.exists()]
+    if not layer_paths:
+        raise FileNotFoundError(f"目录文件不存在: {file_path}")
+    signature = tuple((str(path), catalog_search.file_signature(path)) for path in layer_paths)
+    if file_path.name == 'skill.list':
+        # 技能的热门度排序来自 repo.sort，仓库目录变化后也要重新编译
+        try:
+            signature += (('rank', _catalog_layers(skill_hub_dir / 'repo.sort')[1]),)
+        except FileNotFoundError:
+            pass
+    return layer_paths, signature
+
+
+def _rank_layers(file_path):
+    """技能目录热门度排序所依据的 repo.sort 各层文件，其他目录或 repo.sort 不存在时为 None"""
+    if file_path.name != 'skill.list':
+        return None
+    try:
+        return _catalog_layers(file_path.with_name('repo.sort'))[0]
+    except FileNotFoundError:
+        return None
 
-        total_count = len(all_matching_lines)
 
-        # 计算分页起始位置
-        start_index = (page - 1) * size
-        end_index = start_index + size
+def compile_catalog(file_path, quiet=False):
+    """把目录（合并各层后）编译为带签名哈希的 .bin 文件，返回映射后的 CompiledCatalog，失败返回 None"""
+    try:
+        layer_paths, signature = _catalog_layers(file_path)
+    except Exception as e:
+        if not quiet:
+            print(f"编译目录 {file_path.name} 时出错: {e}")
+        return None
+    return catalog_search.compile_catalog(file_path, layer_paths, signature, _rank_layers(file_path), quiet)
+
+
+def _get_catalog(file_path):
+    """
+    获取目录的解析缓存
+    任意一层的文件大小或修改时间变化（包括增删自定义仓库）后重新解析
+    """
+    layer_paths, signature = _catalog_layers(file_path)
+    return catalog_search.get_catalog(file_path, layer_paths, signature, _rank_layers(file_path))
+
+
+def _use_db():
+    """是否使用 SQLite 目录后端"""
+    if catalog_backend != 'sqlite':
+        return False
+    from skill_hub.utils import catalog_db
+    return catalog_db.available()
+
+
+def _db_name(file_path):
+    """目录在数据库中的名称，例如 skill.list -> skill"""
+    return file_path.name.split('.')[0]
+
+
+def _sync_db(file_path):
+    """目录文件有变化时，把合并去重后的内容增量同步到 ~/.skill-hub/catalog.db，返回同步后的目录版本"""
+    from skill_hub.utils import catalog_db
+
+    layer_paths, signature = _catalog_layers(file_path)
+
+    def load_lines():
+        # 按热门度顺序写入，数据库中的位置即热门度名次
+        lines, hidden, _ = catalog_search.parse_layers(layer_paths)
+        order, _ = catalog_search.rank_order(file_path, lines, _rank_layers(file_path))
+        return [lines[row] for row in order if row not in hidden]
+
+    catalog_db.sync(skill_hub_dir / 'catalog.db', _db_name(file_path), signature, load_lines)
+    return repr(signature)
+
+
+def _ensure_catalog(skill_file_path):
+    """
+    确保目录（搜索技能时包括提供热门度排序的 repo.sort）在各来源中的文件可用，每个来源的刷新时间分别记录在各自的 .meta 中
+    有来源的文件不存在时同时下载；超过刷新周期时先继续使用本地旧文件，同时在后台刷新
+    """
+    fetch_sources(skill_file_path)
+    current_time = time.time()
+    sources = [item for catalog in _required_catalogs(skill_file_path) for item in _source_files(catalog)]
+    for path, url in sources:
+        if url and path.exists():
+            # 检查上次检查更新的时间（没有记录时用文件修改时间）
+            checked_time = _load_meta(path).get('checked')
+            if checked_time is None:
+                checked_time = path.stat().st_mtime
+            if current_time - checked_time > refresh_hours * 60 * 60:
+                refresh_in_background(path, url)
+
+
+def _match(skill_file_path, search="", within=None):
+    """
+    搜索目录文件，返回 SearchResult（使用 SQLite 后端时返回 DbSearchResult）
+    within 为之前的搜索结果且新关键词是其细化时，只在其匹配行中继续筛选
+    """
+    _ensure_catalog(skill_file_path)
+    if _use_db():
+        from skill_hub.utils.catalog_db import DbSearchResult
+        version = _sync_db(skill_file_path)
+        return DbSearchResult(skill_hub_dir / 'catalog.db', _db_name(skill_file_path), search, version)
+
+    return catalog_search.search(_get_catalog(skill_file_path), search, within)
 
-        # 根据分页参数选择对应的数据
-        selected_lines = all_matching_lines[start_index:end_index]
 
+def _search(skill_file_path, search="", page=1, size=50):
+    """搜索技能文件中的技能，返回 (结果列表, 总数)"""
+    try:
+        result = _match(skill_file_path, search)
         # 返回结果和总数
-        return selected_lines, total_count
+        return result.page(page, size), result.total
 
     except Exception as e:
         print(f"读取技能文件时出错: {e}")
@@ -183,6 +678,37 @@ def get_repos(search = "", page=1, size=50):
     skill_file_path = skill_hub_dir / 'repo.sort'
     return _search(skill_file_path, search, page, size)
 
+def match_skills(search="", within=None):
+    """搜索技能，返回可分页、可继续细化的 SearchResult"""
+    return _match(skill_hub_dir / 'skill.list', search, within)
+
+def match_repos(search="", within=None):
+    """搜索仓库，返回可分页、可继续细化的 SearchResult"""
+    return _match(skill_hub_dir / 'repo.sort', search, within)
+
+def _catalog_version(file_path):
+    """目录当前的版本（各层文件签名，只读取文件状态），目录文件不存在时返回 None"""
+    try:
+        return repr(_catalog_layers(file_path)[1])
+    except OSError:
+        return None
+
+def skills_version():
+    """技能目录当前的版本，任意一层文件变化后即改变"""
+    return _catalog_version(skill_hub_dir / 'skill.list')
+
+def repos_version():
+    """仓库目录当前的版本，任意一层文件变化后即改变"""
+    return _catalog_version(skill_hub_dir / 'repo.sort')
+
+def iter_skills(search=""):
+    """按目录顺序逐条返回匹配的技能，不等待全部搜索完成"""
+    yield from match_skills(search).iter_lines()
+
+def iter_repos(search=""):
+    """按目录顺序逐条返回匹配的仓库，不等待全部搜索完成"""
+    yield from match_repos(search).iter_lines()
+
 if __name__ == "__main__":  
     add_custom_repo("https://github.com/youzaiAGI/agent-skills-hub")
     # get_repos()
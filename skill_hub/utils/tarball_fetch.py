@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+压缩包获取引擎 - 通过 HTTP 下载仓库的 tar.gz 压缩包，不需要 git 命令，也不写入 .git 对象
+压缩包以流的方式边下载边解压，只把目标技能目录下的条目写入磁盘，其余条目直接跳过
+
+压缩包地址为 {SKILL_HUB_ARCHIVE_URL}/{owner}/{repo}/tar.gz/HEAD，默认使用 GitHub 的 codeload 服务；
+压缩包中所有条目位于同一个顶层目录下（如 owner-repo-<sha>/），解压时去掉该目录
+"""
+
+import os
+import tarfile
+from pathlib import Path, PurePosixPath
+
+from skill_hub.utils import http_client
+
+archive_url = os.environ.get('SKILL_HUB_ARCHIVE_URL', 'https://codeload.github.com').rstrip('/')
+
+
+def _archive_url(repo):
+    return f"{archive_url}/{repo}/tar.gz/HEAD"
+
+
+def _relative_path(name):
+    """去掉顶层目录后的相对路径，顶层目录本身、绝对路径或包含 .. 的条目返回 None"""
+    parts = PurePosixPath(name).parts
+    if len(parts) < 2 or parts[0] == '/' or '..' in parts:
+        return None
+    return PurePosixPath(*parts[1:])
+
+
+def _wanted(path, skill_names):
+    """条目是否位于某个与技能同名的目录下（技能目录中是否有 SKILL.md 由安装时检查）"""
+    if skill_names is None:
+        return True
+    return any(name in skill_names for name in path.parts[:-1]) or path.name in skill_names
+
+
+def checkout(repo, dest, skill_names=None):
+    """
+    下载仓库压缩包并解压到 dest，返回压缩包记录的提交 sha（没有时为 None）
+    指定 skill_names 时只解压位于同名目录下的条目；技能名与仓库名相同时可能是整个仓库作为一个技能，解压全部条目
+    下载或解压失败时抛出 requests / tarfile 异常
+    """
+    dest = Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    if skill_names is not None:
+        skill_names = set(skill_names)
+        if repo.split('/')[1] in skill_names:
+            skill_names = None
+
+    response = http_client.get(_archive_url(repo), stream=True)
+    try:
+        response.raise_for_status()
+        with tarfile.open(fileobj=response.raw, mode='r|*') as archive:
+            for member in archive:
+                path = _relative_path(member.name)
+                if path is None or not _wanted(path, skill_names):
+                    # 流式读取时跳过的条目不会写入磁盘
+                    continue
+                member.name = str(path)
+                if hasattr(tarfile, 'tar_filter'):
+                    archive.extract(member, dest, filter='tar')
+                else:
+                    archive.extract(member, dest)
+            # GitHub 在 pax 全局头部的 comment 中记录提交 sha
+            return archive.pax_headers.get('comment')
+    finally:
+        response.close()